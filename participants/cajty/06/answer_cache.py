@@ -0,0 +1,117 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class AnswerCache:
+    """LRU/TTL answer cache with an exact-match tier and an embedding-similarity tier"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, max_distance: float = 0.05):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase, collapse whitespace and strip trailing punctuation"""
+        return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+    @staticmethod
+    def _freeze(options: Tuple) -> Tuple:
+        """Hashable options; dicts (metadata filters) become canonical JSON"""
+        return tuple(json.dumps(option, sort_keys=True) if isinstance(option, dict) else option for option in options)
+
+    def _key(self, query: str, options: Tuple) -> Tuple:
+        return (self.normalize(query),) + self._freeze(options)
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds
+
+    def get_exact(self, query: str, options: Tuple = ()) -> Optional[Dict[str, Any]]:
+        """Look up an answer by normalized query and request options"""
+        key = self._key(query, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, time.time()):
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return dict(entry["result"])
+
+    def get_similar(self, embedding: List[float], options: Tuple = ()) -> Optional[Dict[str, Any]]:
+        """Look up the closest cached answer within max_distance (cosine) of the query embedding"""
+        if self.max_distance <= 0:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
+        frozen = self._freeze(options)
+        now = time.time()
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key[1:] == frozen and entry["embedding"] is not None
+                and not self._expired(entry, now)
+            ]
+            if candidates and query_norm > 0:
+                matrix = np.stack([entry["embedding"] for _, entry in candidates])
+                distances = 1.0 - (matrix @ query_vector) / (np.linalg.norm(matrix, axis=1) * query_norm + 1e-12)
+                best = int(np.argmin(distances))
+                if distances[best] <= self.max_distance:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.similar_hits += 1
+                    return dict(entry["result"])
+            self.misses += 1
+            return None
+
+    def put(self, query: str, result: Dict[str, Any], options: Tuple = (),
+            embedding: Optional[List[float]] = None, generation: Optional[int] = None):
+        """Store an answer unless the knowledge base changed since generation was read"""
+        key = self._key(query, options)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = {
+                "result": dict(result),
+                "embedding": np.asarray(embedding, dtype=np.float32) if embedding is not None else None,
+                "created_at": time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the knowledge base changed"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and size"""
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+                "generation": self.generation
+            }
@@ -0,0 +1,72 @@
+"""Benchmark: /chat throughput vs. concurrent clients with a stubbed LLM.
+
+Compares the async request path (POST /chat) against the previous blocking
+chat_with_sources call made directly inside an async handler.
+
+    python benchmarks/bench_async_chat.py --llm-latency 0.2 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import install_stubs, synthetic_text  # noqa: E402
+
+
+async def drive(client, path: str, concurrency: int, requests: int) -> float:
+    """Send requests with a fixed number of concurrent clients, returning requests/sec"""
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            # Unique queries so the answer cache does not short-circuit generation
+            response = await client.post(path, json={"query": f"pump pressure question {i}", "k": 3})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run(args):
+    import httpx
+    import main
+
+    rag_system = main.knowledge_bases.get()
+    rag_system.add_documents(
+        [synthetic_text(i) for i in range(50)],
+        [{"filename": "synthetic.pdf", "page": i + 1, "source": "synthetic.pdf"} for i in range(50)]
+    )
+
+    @main.app.post("/chat-blocking")
+    async def chat_blocking(request: main.ChatRequest):
+        return rag_system.chat_with_sources(request.query, request.k)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'clients':>8} {'async req/s':>12} {'blocking req/s':>15}")
+        for concurrency in args.concurrency:
+            rag_system.answer_cache.invalidate()
+            async_rps = await drive(client, "/chat", concurrency, args.requests)
+            rag_system.answer_cache.invalidate()
+            blocking_rps = await drive(client, "/chat-blocking", concurrency, args.requests)
+            print(f"{concurrency:>8} {async_rps:>12.1f} {blocking_rps:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        install_stubs(tmp, llm_latency=args.llm_latency)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: one-file-at-a-time ingestion vs. the staged bulk pipeline.
+
+Writes synthetic PDFs to a temporary directory and ingests them twice into fresh
+knowledge bases: once with load_pdf_from_file per file (parse, split, embed and
+write strictly in sequence), once with ingest_bulk (the stages overlap). The
+embedding cache is disabled so both runs embed every chunk.
+
+Local embeddings are fast; --embedding-latency replaces them with a stub API that
+takes that long per request, and --embedding-rps rate-limits requests, to mimic a
+remote embedding API, which is where overlapping the stages matters most.
+
+    python benchmarks/bench_bulk_ingest.py --documents 16 --pages 40 --embedding-latency 0.3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import install_stubs, synthetic_pdf  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=40, help="pages per synthetic PDF")
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--embedding-latency", type=float, default=0,
+                        help="seconds per stub embedding request, 0 = local embeddings")
+    parser.add_argument("--embedding-rps", type=float, default=0, help="embedding requests per second, 0 = unlimited")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        install_stubs(tmp, embedding_latency=args.embedding_latency)
+        import config
+        config.EMBEDDING_CACHE_ENABLED = False
+        config.EMBEDDING_REQUESTS_PER_SECOND = args.embedding_rps
+        import main as app_main
+        from bulk_ingest import resolve_sources
+
+        corpus = os.path.join(tmp, "corpus")
+        os.makedirs(corpus)
+        for i in range(args.documents):
+            with open(os.path.join(corpus, f"synthetic_{i}.pdf"), "wb") as f:
+                f.write(synthetic_pdf(args.pages, args.words_per_page, seed=i))
+        sources = resolve_sources(corpus)
+
+        sequential = app_main.knowledge_bases.get("bench-sequential")
+        start = time.perf_counter()
+        pages = chunks = 0
+        for source in sources:
+            result = sequential.load_pdf_from_file(source["path"])
+            pages += result["pages_processed"]
+            chunks += result["chunks_created"]
+        elapsed = time.perf_counter() - start
+        sequential_result = {
+            "seconds": elapsed,
+            "pages": pages,
+            "chunks": chunks,
+            "pages_per_second": pages / elapsed,
+            "chunks_per_second": chunks / elapsed
+        }
+
+        bulk = app_main.knowledge_bases.get("bench-bulk")
+        result = bulk.ingest_bulk(sources)
+        bulk_result = {
+            "seconds": result["elapsed_seconds"],
+            "pages": result["pages_processed"],
+            "chunks": result["chunks_created"],
+            "pages_per_second": result["pages_per_second"],
+            "chunks_per_second": result["chunks_per_second"],
+            "stage_seconds": result["stage_seconds"],
+            "files_failed": result["files_failed"]
+        }
+
+    results = {
+        "benchmark": "bulk_ingest",
+        "documents": args.documents,
+        "pages_per_document": args.pages,
+        "embedding_latency": args.embedding_latency,
+        "embedding_rps": args.embedding_rps,
+        "sequential": sequential_result,
+        "bulk": bulk_result
+    }
+
+    print(f"\n{'mode':<12} {'seconds':>9} {'pages/s':>9} {'chunks/s':>9}")
+    for mode in ("sequential", "bulk"):
+        row = results[mode]
+        print(f"{mode:<12} {row['seconds']:>9.2f} {row['pages_per_second']:>9.1f} {row['chunks_per_second']:>9.1f}")
+    print(f"\nBulk stage busy time (s): {bulk_result['stage_seconds']}")
+    print(f"Speed-up: {sequential_result['seconds'] / bulk_result['seconds']:.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark: per-request knowledge-base emptiness check.
+
+Compares the old chat-path check (client.get_collection + count on every
+request) with ChromaDBManager's in-memory collection stats.
+
+    python benchmarks/bench_collection_stats.py --chunks 5000 --requests 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import config  # noqa: E402
+
+
+def time_per_call(func, requests: int) -> float:
+    """Average microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        func()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.CHROMA_DB_PATH = os.path.join(tmp, "chroma_db")
+        config.EMBEDDING_CACHE_PATH = os.path.join(tmp, "embeddings.sqlite3")
+        config.KEYWORD_INDEX_DIR = os.path.join(tmp, "keyword_index")
+        config.SUMMARY_STORE_PATH = os.path.join(tmp, "summaries", "summaries.sqlite3")
+        config.INGEST_MANIFEST_PATH = os.path.join(tmp, "ingest_manifest", "manifest.sqlite3")
+        config.EMBEDDING_PROVIDER = "local"
+        from database import ChromaDBManager
+
+        manager = ChromaDBManager()
+        rng = random.Random(0)
+        for start in range(0, args.chunks, 1000):
+            batch = range(start, min(start + 1000, args.chunks))
+            manager.collection.add(
+                ids=[f"chunk-{i}" for i in batch],
+                embeddings=[[rng.random() for _ in range(config.LOCAL_EMBEDDING_DIM)] for _ in batch],
+                documents=[f"chunk {i}" for i in batch]
+            )
+        manager.invalidate_stats()
+
+        def old_check():
+            collection = manager.client.get_collection(config.COLLECTION_NAME)
+            return collection.count() == 0
+
+        old_us = time_per_call(old_check, args.requests)
+        new_us = time_per_call(manager.is_empty, args.requests)
+
+        print(f"Chunks: {args.chunks}, requests: {args.requests}")
+        print(f"get_collection + count per request: {old_us:9.1f} us")
+        print(f"in-memory stats per request:        {new_us:9.1f} us")
+        print(f"Overhead removed per request:       {old_us - new_us:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark and check of the batched embedding pipeline against a stub embedding API.
+
+StubEmbeddings answers each request after a fixed latency and can fail every n-th
+request. The run embeds the same texts at several concurrency levels and checks that:
+
+- vectors come back in input order and match what the stub returns per text,
+- failed requests are retried until every batch succeeds,
+- no more than max_concurrency requests are in flight at once,
+- a request rate limit is respected.
+
+Exits with status 1 if a check fails.
+
+    python benchmarks/bench_embedding_pipeline.py --texts 2000 --latency 0.1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import StubEmbeddings, synthetic_text  # noqa: E402
+
+from embedding_pipeline import BatchedEmbeddings  # noqa: E402
+
+
+def run(texts, latency: float, batch_size: int, max_concurrency: int, fail_every: int = 0,
+        requests_per_second: float = 0) -> dict:
+    """Embed texts through BatchedEmbeddings and return timing plus check results"""
+    stub = StubEmbeddings(latency=latency, fail_every=fail_every)
+    pipeline = BatchedEmbeddings(
+        stub,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
+        max_retries=3,
+        backoff_base=0.01
+    )
+    start = time.perf_counter()
+    vectors = pipeline.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+
+    batches = -(-len(texts) // batch_size)
+    checks = {
+        "order": vectors == [stub.vector(text) for text in texts],
+        "retries": stub.requests == batches + stub.failures,
+        "concurrency": stub.peak_inflight <= max_concurrency
+    }
+    if requests_per_second:
+        # The bucket starts full, so the first second's worth of requests may go out at once
+        checks["rate_limit"] = stub.requests <= requests_per_second * elapsed + max(1.0, requests_per_second)
+    return {
+        "max_concurrency": max_concurrency,
+        "fail_every": fail_every,
+        "requests_per_second": requests_per_second,
+        "seconds": elapsed,
+        "chunks_per_second": len(texts) / elapsed,
+        "requests": stub.requests,
+        "failures": stub.failures,
+        "peak_inflight": stub.peak_inflight,
+        "checks": checks
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per stub embedding request")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    texts = [synthetic_text(i, words=60) for i in range(args.texts)]
+    results = [run(texts, args.latency, args.batch_size, concurrency) for concurrency in (1, 2, 4, 8)]
+    results.append(run(texts, args.latency, args.batch_size, 4, fail_every=3))
+    results.append(run(texts, args.latency, args.batch_size, 8, requests_per_second=5))
+
+    print(f"\n{'concurrency':>11} {'fail every':>10} {'rps limit':>9} {'seconds':>8} {'chunks/s':>9} "
+          f"{'requests':>8} {'peak':>5}  checks")
+    for row in results:
+        failed = [name for name, ok in row["checks"].items() if not ok]
+        print(f"{row['max_concurrency']:>11} {row['fail_every'] or '-':>10} {row['requests_per_second'] or '-':>9} "
+              f"{row['seconds']:>8.2f} {row['chunks_per_second']:>9.0f} {row['requests']:>8} "
+              f"{row['peak_inflight']:>5}  {'FAILED: ' + ', '.join(failed) if failed else 'ok'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "embedding_pipeline", "texts": args.texts, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if any(not ok for row in results for ok in row["checks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
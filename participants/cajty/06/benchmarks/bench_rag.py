@@ -0,0 +1,177 @@
+"""Benchmark: end-to-end ingestion and /chat latency on a synthetic corpus.
+
+Generates synthetic PDFs, ingests them through RAGSystem with local embeddings,
+then drives POST /chat at several concurrency levels with a stubbed LLM.
+Everything runs offline; results are printed and optionally written as JSON
+so runs can be compared across commits.
+
+    python benchmarks/bench_rag.py --documents 4 --pages 50 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import APP_DIR, install_stubs, synthetic_pdf, synthetic_text  # noqa: E402
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_ingestion(rag_system, workdir: str, args) -> dict:
+    """Ingest synthetic PDFs and measure pages/sec and chunks/sec"""
+    paths = []
+    for i in range(args.documents):
+        path = os.path.join(workdir, f"synthetic_{i}.pdf")
+        with open(path, "wb") as f:
+            f.write(synthetic_pdf(args.pages, args.words_per_page, seed=i))
+        paths.append(path)
+
+    pages = chunks = 0
+    start = time.perf_counter()
+    for path in paths:
+        result = rag_system.load_pdf_from_file(path)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        pages += result["pages_processed"]
+        chunks += result["chunks_created"]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": args.documents,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed,
+        "chunks_per_second": chunks / elapsed
+    }
+
+
+async def bench_chat_level(client, rag_system, concurrency: int, args) -> dict:
+    """Drive /chat with a fixed number of concurrent clients and record per-request latency"""
+    rag_system.answer_cache.invalidate()
+    counter = iter(range(args.requests))
+    latencies, cached = [], 0
+
+    async def worker():
+        nonlocal cached
+        for i in counter:
+            # Distinct random queries so the answer cache rarely short-circuits generation
+            payload = {"query": synthetic_text(concurrency * 1_000_000 + i, 12), "k": args.k}
+            started = time.perf_counter()
+            response = await client.post("/chat", json=payload)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            cached += response.json().get("cached", False)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "cached": cached,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+
+async def bench_chat(rag_system, args) -> list:
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Warm up lazily initialized clients and caches before measuring
+        (await client.post("/chat", json={"query": "warmup", "k": args.k})).raise_for_status()
+        return [await bench_chat_level(client, rag_system, concurrency, args) for concurrency in args.concurrency]
+
+
+def run(workdir: str, args) -> dict:
+    import config
+    import main
+
+    rag_system = main.knowledge_bases.get()
+    ingestion = bench_ingestion(rag_system, workdir, args)
+    chat = asyncio.run(bench_chat(rag_system, args))
+
+    return {
+        "benchmark": "rag",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "documents": args.documents,
+            "pages": args.pages,
+            "words_per_page": args.words_per_page,
+            "llm_latency": args.llm_latency,
+            "requests": args.requests,
+            "k": args.k,
+            "embedding_provider": config.EMBEDDING_PROVIDER,
+            "chunk_size": config.CHUNK_SIZE,
+            "chunk_overlap": config.CHUNK_OVERLAP
+        },
+        "ingestion": ingestion,
+        "chat": chat
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=50, help="pages per synthetic PDF")
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        install_stubs(tmp, llm_latency=args.llm_latency)
+        results = run(tmp, args)
+
+    ingestion = results["ingestion"]
+    print(f"\nIngestion: {ingestion['pages']} pages, {ingestion['chunks']} chunks in {ingestion['seconds']:.2f}s "
+          f"({ingestion['pages_per_second']:.1f} pages/s, {ingestion['chunks_per_second']:.1f} chunks/s)")
+    print(f"\n{'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cached':>7}")
+    for level in results["chat"]:
+        print(f"{level['concurrency']:>8} {level['requests_per_second']:>8.1f} {level['p50_ms']:>8.1f} "
+              f"{level['p95_ms']:>8.1f} {level['p99_ms']:>8.1f} {level['cached']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
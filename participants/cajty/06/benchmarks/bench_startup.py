@@ -0,0 +1,109 @@
+"""Benchmark: server cold start and an import-time report.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and reports
+which top-level packages and modules dominate import time, then measures how
+long the lazy warm-up (Chroma, LangChain and the default knowledge base) takes
+after the app is importable.
+
+    python benchmarks/bench_startup.py --top 15 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import APP_DIR  # noqa: E402
+
+WARM_UP_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import config
+workdir = sys.argv[1]
+config.CHROMA_DB_PATH = os.path.join(workdir, "chroma_db")
+config.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embedding_cache", "embeddings.sqlite3")
+config.KEYWORD_INDEX_DIR = os.path.join(workdir, "keyword_index")
+config.SUMMARY_STORE_PATH = os.path.join(workdir, "summaries", "summaries.sqlite3")
+config.INGEST_MANIFEST_PATH = os.path.join(workdir, "ingest_manifest", "manifest.sqlite3")
+config.EMBEDDING_PROVIDER = "local"
+main.knowledge_bases.warm_up()
+ready = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "warm_up_seconds": ready - imported}))
+"""
+
+
+def run_python(args, env) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str):
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_report(env, top: int) -> dict:
+    """Import main in a fresh interpreter and summarize where the time went"""
+    rows = parse_importtime(run_python(["-X", "importtime", "-c", "import main"], env).stderr)
+    total_us = next(cumulative for name, _, cumulative, _ in rows if name == "main")
+
+    packages = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    modules = sorted(rows, key=lambda row: row[2], reverse=True)
+    return {
+        "total_ms": total_us / 1000,
+        "packages": [
+            {"package": package, "self_ms": self_us / 1000}
+            for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "modules": [
+            {"module": name, "cumulative_ms": cumulative_us / 1000}
+            for name, _, cumulative_us, _ in modules[:top]
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="number of packages and modules to list")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    env = {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark")}
+    report = import_report(env, args.top)
+    with tempfile.TemporaryDirectory() as tmp:
+        startup = json.loads(run_python(["-c", WARM_UP_SCRIPT, tmp], env).stdout.strip().splitlines()[-1])
+    results = {"benchmark": "startup", "import": report, "startup": startup}
+
+    print(f"import main: {report['total_ms']:.0f} ms")
+    print(f"\n{'package':<32} {'self ms':>9}")
+    for package in report["packages"]:
+        print(f"{package['package']:<32} {package['self_ms']:>9.1f}")
+    print(f"\n{'module':<48} {'cumulative ms':>14}")
+    for module in report["modules"]:
+        print(f"{module['module']:<48} {module['cumulative_ms']:>14.1f}")
+    print(f"\nApp importable after {startup['import_seconds'] * 1000:.0f} ms; "
+          f"warm-up (Chroma, LangChain, default knowledge base) took a further "
+          f"{startup['warm_up_seconds'] * 1000:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark: recall vs. latency vs. memory of the HNSW vector index.
+
+Loads synthetic clustered embeddings into a temporary collection and compares Chroma HNSW
+at several search ef values against exact float32 nearest neighbours.
+
+    python benchmarks/bench_vector_index.py --vectors 50000 --dim 768 --output index.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubs import APP_DIR  # noqa: E402,F401
+
+import config  # noqa: E402
+
+
+def synthetic_embeddings(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around random cluster centres, like embeddings of related chunks"""
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, size=count)] + 0.6 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k row indexes by squared L2 distance"""
+    scores = (vectors ** 2).sum(axis=1)[None, :] - 2.0 * queries @ vectors.T
+    top = np.argpartition(scores, k, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def measure(search, queries: np.ndarray, truth: list, k: int) -> dict:
+    """Run every query, returning recall@k and latency percentiles"""
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query.tolist())
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {doc.id for doc, _, _ in found})
+    return {
+        "recall": hits / (k * len(queries)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=config.LOCAL_EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ef", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = synthetic_embeddings(args.vectors, args.dim, clusters=max(1, args.vectors // 200), rng=rng)
+    queries = vectors[rng.integers(0, args.vectors, size=args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    truth = [{ids[i] for i in row} for row in exact_neighbours(vectors, queries, args.k)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.CHROMA_DB_PATH = os.path.join(tmp, "chroma_db")
+        config.EMBEDDING_CACHE_PATH = os.path.join(tmp, "embeddings.sqlite3")
+        config.KEYWORD_INDEX_DIR = os.path.join(tmp, "keyword_index")
+        config.EMBEDDING_PROVIDER = "local"
+        config.LOCAL_EMBEDDING_DIM = args.dim
+        from database import ChromaDBManager
+
+        manager = ChromaDBManager()
+        print(f"Loading {args.vectors} x {args.dim} vectors "
+              f"(HNSW M={config.HNSW_M}, construction ef={config.HNSW_CONSTRUCTION_EF})")
+        for start in range(0, args.vectors, 5000):
+            manager.collection.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000],
+                                   documents=ids[start:start + 5000])
+
+        float32_bytes = vectors.nbytes
+        results = {
+            "benchmark": "vector_index",
+            "vectors": args.vectors,
+            "dim": args.dim,
+            "k": args.k,
+            "float32_bytes": float32_bytes,
+            "hnsw": []
+        }
+
+        # Vectors plus roughly 2*M neighbour links of 4 bytes per node at the base layer
+        hnsw_bytes = float32_bytes + args.vectors * 2 * config.HNSW_M * 4
+        for ef in args.ef:
+            manager.collection.modify(configuration={"hnsw": {"ef_search": ef}})
+            row = {"ef_search": ef, "bytes": hnsw_bytes,
+                   **measure(lambda query: manager._query_by_vector(query, args.k), queries, truth, args.k)}
+            results["hnsw"].append(row)
+
+    print(f"\nfloat32 vectors: {float32_bytes / 2 ** 20:.1f} MiB")
+    print(f"\n{'index':<24} {'recall@' + str(args.k):>10} {'p50 ms':>9} {'p95 ms':>9} {'MiB':>8}")
+    for row in results["hnsw"]:
+        print(f"{'hnsw ef=' + str(row['ef_search']):<24} {row['recall']:>10.3f} "
+              f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['bytes'] / 2 ** 20:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Offline stand-ins for the Gemini chat and embedding clients and synthetic corpora used by the benchmarks."""
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that answers after a fixed latency, streaming word by word"""
+
+    latency: float = 0.2
+    answer: str = "This is a stubbed answer generated for benchmarking the RAG pipeline."
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self.answer.split(" ")
+        for word in words:
+            time.sleep(self.latency / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        words = self.answer.split(" ")
+        for word in words:
+            await asyncio.sleep(self.latency / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+class StubEmbeddings(Embeddings):
+    """Embedding API stand-in: every request takes a fixed latency and may fail on purpose
+
+    Vectors are derived from the text alone, so callers can check that results come back
+    in input order. Requests, failures and the peak number of concurrent requests are counted.
+    """
+
+    def __init__(self, latency: float = 0.3, dim: int = 64, fail_every: int = 0):
+        self.latency = latency
+        self.dim = dim
+        self.fail_every = fail_every  # every n-th request raises, 0 = never
+        self.requests = 0
+        self.failures = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+        self._lock = threading.Lock()
+
+    def vector(self, text: str) -> List[float]:
+        """The vector this stub returns for a text"""
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255.0 for i in range(self.dim)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.requests += 1
+            request = self.requests
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+        try:
+            time.sleep(self.latency)
+            if self.fail_every and request % self.fail_every == 0:
+                with self._lock:
+                    self.failures += 1
+                raise RuntimeError("503 Service Unavailable (stub)")
+            return [self.vector(text) for text in texts]
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def install_stubs(workdir: str, llm_latency: float = 0.2, embedding_latency: float = 0):
+    """Point storage at workdir, use local embeddings and replace the Gemini chat client with a stub
+
+    With embedding_latency, the local embeddings are replaced by StubEmbeddings with that
+    latency per request, to mimic a remote embedding API.
+    """
+    import config
+    config.CHROMA_DB_PATH = os.path.join(workdir, "chroma_db")
+    config.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embedding_cache", "embeddings.sqlite3")
+    config.KEYWORD_INDEX_DIR = os.path.join(workdir, "keyword_index")
+    config.SUMMARY_STORE_PATH = os.path.join(workdir, "summaries", "summaries.sqlite3")
+    config.INGEST_MANIFEST_PATH = os.path.join(workdir, "ingest_manifest", "manifest.sqlite3")
+    config.EMBEDDING_PROVIDER = "local"
+    # The request rate limit protects the remote embedding API; local embeddings do not need it
+    config.EMBEDDING_REQUESTS_PER_SECOND = 0
+    # Summaries would time the stub LLM, not the pipeline
+    config.SUMMARIES_ENABLED = False
+
+    import rag_service
+    rag_service.create_llm = lambda: StubChatModel(latency=llm_latency)
+
+    if embedding_latency:
+        import database
+        dim = config.LOCAL_EMBEDDING_DIM
+        database.create_embeddings = lambda: (
+            StubEmbeddings(latency=embedding_latency, dim=dim), f"stub:{dim}", dim
+        )
+
+
+def synthetic_text(seed: int, words: int = 400) -> str:
+    """Pseudo-random technical prose for synthetic documents"""
+    import random
+    vocabulary = (
+        "pump valve pressure sensor firmware error code E1042 E2210 reset calibration manual "
+        "torque bearing seal gasket inspection warranty replacement voltage current relay "
+        "controller schedule maintenance filter flow rate temperature alarm threshold"
+    ).split()
+    rng = random.Random(seed)
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def synthetic_pdf(pages: int, words_per_page: int = 400, seed: int = 0) -> bytes:
+    """Build a minimal text PDF with one synthetic_text block per page"""
+    import textwrap
+    font_ref = 3 + 2 * pages
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>"
+    ]
+    for i in range(pages):
+        lines = textwrap.wrap(synthetic_text(seed * 100_000 + i, words_per_page), 90)
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td\n" + "\n".join(f"({line}) '" for line in lines) + "\nET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
@@ -0,0 +1,380 @@
+import glob
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+import zipfile
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from metrics import StageTimer
+from pdf_extract import hash_file, iter_pages_parallel, iter_stream_pages
+
+if TYPE_CHECKING:
+    from rag_service import RAGSystem
+
+_STOP = object()
+
+
+def resolve_sources(path: str, max_files: int = 10_000) -> List[Dict[str, Any]]:
+    """Expand a directory, glob pattern or zip archive into the PDFs to ingest
+
+    Raises FileNotFoundError when nothing matches and ValueError when there are too many files.
+    """
+    if os.path.isdir(path):
+        paths = sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True))
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            members = sorted(
+                (info for info in archive.infolist()
+                 if not info.is_dir() and info.filename.lower().endswith(".pdf")),
+                key=lambda info: info.filename
+            )
+        sources = [
+            {"filename": os.path.basename(info.filename), "archive": path, "member": info.filename,
+             "size": info.file_size}
+            for info in members
+        ]
+        return _check_count(sources, path, max_files)
+    else:
+        paths = sorted(glob.glob(path, recursive=True))
+
+    sources = [
+        {"filename": os.path.basename(pdf_path), "path": pdf_path}
+        for pdf_path in paths
+        if os.path.isfile(pdf_path) and pdf_path.lower().endswith(".pdf")
+    ]
+    return _check_count(sources, path, max_files)
+
+
+def _check_count(sources: List[Dict[str, Any]], path: str, max_files: int) -> List[Dict[str, Any]]:
+    if not sources:
+        raise FileNotFoundError(f"No PDF files found at {path}")
+    if len(sources) > max_files:
+        raise ValueError(f"{path} contains {len(sources)} PDF files (limit is {max_files})")
+    return sources
+
+
+class BulkIngestion:
+    """Ingests many PDFs through parse -> split -> embed -> write stages running concurrently
+
+    Stages exchange page windows over bounded queues, so the slowest stage sets the pace and at
+    most queue_size windows wait between any two stages. A file that fails is recorded and
+    skipped by the later stages; the rest of the batch continues.
+    """
+
+    def __init__(self, rag_system: "RAGSystem", parse_workers: int = 2, queue_size: int = 4,
+                 page_window: int = 16, embed_chunks: int = 400):
+        self.rag_system = rag_system
+        self.db_manager = rag_system.db_manager
+        self.parse_workers = max(1, parse_workers)
+        self.queue_size = max(1, queue_size)
+        self.page_window = max(1, page_window)
+        self.embed_chunks = max(1, embed_chunks)
+        self._lock = threading.Lock()
+        self._progress = {"pages_processed": 0, "chunks_processed": 0}
+        self._progress_callback = None
+
+    def run(self, sources: List[Dict[str, Any]],
+            progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Ingest every source and return aggregate throughput plus one result per file"""
+        started = time.perf_counter()
+        self._progress_callback = progress_callback
+        files = [self._new_file(source) for source in sources]
+        pending = queue.Queue()
+        seen = set()
+        for state in files:
+            # Filenames identify documents, so a second file with the same name would replace the first
+            if state["filename"] in seen:
+                self._fail(state, f"Duplicate filename in batch: {state['filename']}")
+                continue
+            seen.add(state["filename"])
+            pending.put(state)
+
+        to_split, to_embed, to_write = (queue.Queue(maxsize=self.queue_size) for _ in range(3))
+        timers = {name: StageTimer() for name in ("split", "embed", "write")}
+        parse_timers = [StageTimer() for _ in range(self.parse_workers)]
+
+        parsers = [
+            threading.Thread(target=self._parse_stage, args=(pending, to_split, timer),
+                             name=f"bulk-parse-{i}", daemon=True)
+            for i, timer in enumerate(parse_timers)
+        ]
+        stages = [
+            threading.Thread(target=self._split_stage, args=(to_split, to_embed, timers["split"]),
+                             name="bulk-split", daemon=True),
+            threading.Thread(target=self._embed_stage, args=(to_embed, to_write, timers["embed"]),
+                             name="bulk-embed", daemon=True),
+            threading.Thread(target=self._write_stage, args=(to_write, timers["write"]),
+                             name="bulk-write", daemon=True)
+        ]
+        for thread in parsers + stages:
+            thread.start()
+        for thread in parsers:
+            thread.join()
+        to_split.put(_STOP)
+        for thread in stages:
+            thread.join()
+
+        self._finish_files(files, timers["write"])
+        elapsed = time.perf_counter() - started
+
+        stage_seconds = {"parse": sum(timer.stages.get("parse", 0.0) for timer in parse_timers),
+                         "hash": sum(timer.stages.get("hash", 0.0) for timer in parse_timers)}
+        for timer in timers.values():
+            for name, seconds in timer.stages.items():
+                stage_seconds[name] = stage_seconds.get(name, 0.0) + seconds
+
+        succeeded = [state for state in files if state["status"] == "completed"]
+        failed = [state for state in files if state["status"] == "failed"]
+        skipped = [state for state in files if state["status"] == "skipped"]
+        pages = sum(state["pages_processed"] for state in files)
+        chunks = sum(state["added"] for state in files)
+        return {
+            # Per-file failures are reported in "files"; the job only fails if no file made it in
+            "success": bool(succeeded or skipped),
+            "message": (
+                f"Ingested {len(succeeded)} of {len(files)} files "
+                f"({len(skipped)} unchanged, {len(failed)} failed): "
+                f"{pages} pages, {chunks} new chunks in {elapsed:.1f}s"
+            ),
+            "files_total": len(files),
+            "files_succeeded": len(succeeded),
+            "files_skipped": len(skipped),
+            "files_failed": len(failed),
+            "pages_processed": pages,
+            "chunks_created": chunks,
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_per_second": round(pages / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_second": round(chunks / elapsed, 2) if elapsed else 0.0,
+            "stage_seconds": {name: round(seconds, 3) for name, seconds in stage_seconds.items()},
+            "files": [self._file_result(state) for state in files]
+        }
+
+    @staticmethod
+    def _new_file(source: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "source": source,
+            "filename": source["filename"],
+            "status": "queued",
+            "error": None,
+            "file_hash": None,
+            "pages_resumed": 0,
+            "pages_processed": 0,
+            "ids": [],
+            "added": 0,
+            "skipped": 0
+        }
+
+    def _file_result(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "filename": state["filename"],
+            "source": state["source"].get("path") or f"{state['source']['archive']}:{state['source']['member']}",
+            "status": state["status"],
+            "error": state["error"],
+            "document_id": self.db_manager.document_id_for(state["filename"]),
+            "pages_processed": state["pages_processed"],
+            "pages_resumed": state["pages_resumed"],
+            "chunks_created": state["added"],
+            "chunks_unchanged": state["skipped"]
+        }
+
+    def _open(self, state: Dict[str, Any], timer: StageTimer) -> Optional[Iterable[Tuple[int, str]]]:
+        """Hash a source and open its pages after the last committed one; None when its content is already ingested"""
+        source = state["source"]
+        if "archive" in source:
+            if source["size"] > config.MAX_UPLOAD_BYTES:
+                raise ValueError(f"File too large (limit is {config.MAX_UPLOAD_BYTES} bytes)")
+            with timer.stage("parse"):
+                with zipfile.ZipFile(source["archive"]) as archive:
+                    content = archive.read(source["member"])
+            with timer.stage("hash"):
+                state["file_hash"] = hashlib.sha256(content).hexdigest()
+            if self.rag_system.is_file_ingested(state["file_hash"]):
+                return None
+            return iter_stream_pages(io.BytesIO(content), self._resume(state))
+
+        with timer.stage("hash"):
+            state["file_hash"] = hash_file(source["path"])
+        if self.rag_system.is_file_ingested(state["file_hash"]):
+            return None
+        start_page = self._resume(state)
+        if config.PDF_PARALLEL_EXTRACTION:
+            # Extraction is CPU-bound; in the process pool it runs alongside the other stages
+            # instead of competing with them for the GIL, whatever the file size
+            return iter_pages_parallel(
+                source["path"],
+                workers=config.PDF_EXTRACT_WORKERS,
+                pages_per_task=config.PDF_PAGES_PER_TASK,
+                max_inflight_tasks=config.PDF_MAX_INFLIGHT_TASKS,
+                start_page=start_page
+            )
+        _, pages = self.rag_system.open_pdf_pages(source["path"], timer, start_page)
+        return pages
+
+    def _resume(self, state: Dict[str, Any]) -> int:
+        """Pick up the pages and chunks an interrupted earlier run committed; returns the first page to parse"""
+        pages_committed, chunk_ids = self.rag_system.resume_point(state["filename"], state["file_hash"])
+        state["pages_resumed"] = pages_committed
+        state["ids"].extend(chunk_ids)
+        return pages_committed + 1
+
+    def _parse_stage(self, pending: queue.Queue, output: queue.Queue, timer: StageTimer):
+        """Extract pages file by file and emit them in windows of page_window pages"""
+        while True:
+            try:
+                state = pending.get_nowait()
+            except queue.Empty:
+                return
+            state["status"] = "running"
+            try:
+                pages = self._open(state, timer)
+                if pages is None:
+                    state["status"] = "skipped"
+                else:
+                    texts, metadatas = [], []
+                    for page_number, text in timer.timed_iter(pages, "parse"):
+                        texts.append(text)
+                        metadatas.append({
+                            "source": state["filename"],
+                            "page": page_number,
+                            "filename": state["filename"],
+                            "file_hash": state["file_hash"]
+                        })
+                        if len(texts) >= self.page_window:
+                            output.put(("window", state, texts, metadatas))
+                            texts, metadatas = [], []
+                        if state["error"]:
+                            break
+                    if texts:
+                        output.put(("window", state, texts, metadatas))
+            except Exception as e:
+                self._fail(state, f"Error processing PDF: {str(e)}")
+            output.put(("done", state))
+
+    def _split_stage(self, source: queue.Queue, output: queue.Queue, timer: StageTimer):
+        """Chunk page windows and drop chunks that are already stored"""
+        while (item := source.get()) is not _STOP:
+            if item[0] == "window" and not item[1]["error"]:
+                _, state, texts, metadatas = item
+                try:
+                    chunks = self.db_manager.prepare_chunks(texts, metadatas, timer)
+                    output.put(("window", state, len(texts), metadatas[-1]["page"], chunks))
+                    continue
+                except Exception as e:
+                    self._fail(state, f"Error splitting PDF: {str(e)}")
+            if item[0] == "done":
+                output.put(item)
+        output.put(_STOP)
+
+    def _embed_stage(self, source: queue.Queue, output: queue.Queue, timer: StageTimer):
+        """Embed the new chunks of several windows at once, so every concurrent embedding batch is used
+
+        Windows are gathered until they hold embed_chunks new chunks or nothing else is waiting,
+        then embedded with one call and passed on in their original order.
+        """
+        pending, pending_chunks = [], 0
+        while (item := source.get()) is not _STOP:
+            pending.append(item)
+            if item[0] == "window":
+                pending_chunks += len(item[4]["new_ids"])
+            if pending_chunks >= self.embed_chunks or source.empty():
+                self._embed_pending(pending, output, timer)
+                pending, pending_chunks = [], 0
+        self._embed_pending(pending, output, timer)
+        output.put(_STOP)
+
+    def _embed_pending(self, pending: List[tuple], output: queue.Queue, timer: StageTimer):
+        """Embed the gathered windows of files that have not failed and forward every item"""
+        windows = [item for item in pending if item[0] == "window" and not item[1]["error"]]
+        documents = [document for item in windows for document in item[4]["new_documents"]]
+        try:
+            embeddings = []
+            if documents:
+                with timer.stage("embed"):
+                    embeddings = self.db_manager.embeddings.embed_documents(documents)
+        except Exception as e:
+            for item in windows:
+                self._fail(item[1], f"Error embedding PDF: {str(e)}")
+            windows = []
+
+        embedded = {id(item) for item in windows}
+        offset = 0
+        for item in pending:
+            if item[0] == "done":
+                output.put(item)
+            elif id(item) in embedded:
+                _, state, pages, last_page, chunks = item
+                count = len(chunks["new_ids"])
+                output.put(("window", state, pages, last_page, chunks, embeddings[offset:offset + count]))
+                offset += count
+
+    def _write_stage(self, source: queue.Queue, timer: StageTimer):
+        """Store embedded windows and finalize each file once all of its windows are written"""
+        while (item := source.get()) is not _STOP:
+            state = item[1]
+            try:
+                if item[0] == "window" and not state["error"]:
+                    _, _, pages, last_page, chunks, embeddings = item
+                    with timer.stage("write"):
+                        self.db_manager.write_chunks(chunks, embeddings)
+                        self.rag_system.manifest.commit_pages(
+                            self.rag_system.knowledge_base, state["filename"], last_page, chunks["ids"]
+                        )
+                    if chunks["new_ids"]:
+                        self.rag_system.answer_cache.invalidate()
+                    state["ids"].extend(chunks["ids"])
+                    state["added"] += len(chunks["new_ids"])
+                    state["skipped"] += len(chunks["unchanged_ids"])
+                    state["pages_processed"] += pages
+                    self._report(pages, len(chunks["ids"]))
+                elif item[0] == "done" and state["status"] == "running":
+                    self._complete(state, timer)
+            except Exception as e:
+                self._fail(state, f"Error storing PDF: {str(e)}")
+
+    def _complete(self, state: Dict[str, Any], timer: StageTimer):
+        """Drop chunks of an earlier version of the file and mark it completed, also in the manifest"""
+        if not state["ids"]:
+            self._fail(state, "Failed to process PDF: no text extracted")
+            return
+        with timer.stage("write"):
+            if self.db_manager.remove_stale_chunks(state["filename"], state["ids"]):
+                self.rag_system.answer_cache.invalidate()
+            self.rag_system.manifest.complete(
+                self.rag_system.knowledge_base, state["filename"], state["pages_resumed"] + state["pages_processed"]
+            )
+        state["status"] = "completed"
+
+    def _finish_files(self, files: List[Dict[str, Any]], timer: StageTimer):
+        """Persist indexes once, then summarize the files that changed"""
+        with timer.stage("write"):
+            self.db_manager.save_keyword_index()
+        completed = [state for state in files if state["status"] == "completed"]
+        if not (config.SUMMARIES_ENABLED and completed):
+            return
+        # Unchanged documents keep their stored summaries
+        with timer.stage("summarize"):
+            try:
+                for state in completed:
+                    self.rag_system.summarize_document(self.db_manager.document_id_for(state["filename"]))
+                self.rag_system.refresh_corpus_summary()
+            except Exception as e:
+                print(f"Error summarizing bulk ingestion: {e}")
+
+    def _fail(self, state: Dict[str, Any], message: str):
+        with self._lock:
+            if not state["error"]:
+                print(f"Bulk ingestion of {state['filename']} failed: {message}")
+                state["error"] = message
+            state["status"] = "failed"
+
+    def _report(self, pages: int, chunks: int):
+        with self._lock:
+            self._progress["pages_processed"] += pages
+            self._progress["chunks_processed"] += chunks
+            progress = dict(self._progress)
+        if self._progress_callback:
+            self._progress_callback(**progress)
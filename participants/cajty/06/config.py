@@ -8,12 +8,113 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-1.5-flash"
 
 
-CHROMA_DB_PATH = "./chroma_db"
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+# Caches, indexes and stores below live next to the Chroma database, so moving it moves them too
+DATA_DIR = os.path.dirname(os.path.normpath(CHROMA_DB_PATH)) or "."
 COLLECTION_NAME = "rag_documents"
+COLLECTION_STATS_TTL_SECONDS = 60  # in-memory count is re-read from storage after this long
+CHROMA_THREAD_POOL_SIZE = 8  # threads for blocking Chroma/embedding calls from async handlers
+
+# HNSW vector index; space, M and construction ef are fixed when a collection is created,
+# search ef is also applied to existing collections when they are opened
+HNSW_SPACE = "l2"  # "l2", "cosine" or "ip"
+HNSW_M = 16  # graph neighbours per node: more improves recall and costs memory
+HNSW_CONSTRUCTION_EF = 100  # candidate list while building: more improves recall and slows writes
+HNSW_SEARCH_EF = 100  # candidate list per query: more improves recall and costs latency
+
+# Multi-tenant knowledge bases: one collection each, COLLECTION_NAME is the default
+KNOWLEDGE_BASE_HEADER = "X-Knowledge-Base"
+MAX_OPEN_KNOWLEDGE_BASES = 32  # least recently used knowledge bases beyond this are closed
 
 # Server Configuration
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
+SERVER_RELOAD = os.getenv("SERVER_RELOAD", "false").lower() == "true"  # auto-reload for development only
+SERVER_LOG_LEVEL = os.getenv("SERVER_LOG_LEVEL", "info")
+WARM_UP_ON_STARTUP = True  # open the default knowledge base in the background once the server is listening
 
 
+# Embeddings: "google" (Gemini API) or "local" (offline hashed n-grams, no network)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "google")
 EMBEDDING_MODEL = "text-embedding-004"
+LOCAL_EMBEDDING_DIM = 384
+
+# Chunking
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Embedding cache (persisted next to the Chroma database)
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache", "embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+
+# Embedding pipeline
+EMBEDDING_BATCH_SIZE = 100
+EMBEDDING_MAX_CONCURRENCY = 4
+EMBEDDING_REQUESTS_PER_SECOND = 10  # 0 disables rate limiting
+EMBEDDING_MAX_RETRIES = 3
+EMBEDDING_RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+
+# Background ingestion
+INGESTION_WORKERS = 2
+INGESTION_MAX_FINISHED_JOBS = 200
+DELETE_BATCH_SIZE = 500  # chunks removed per Chroma delete call
+
+# Ingestion manifest (persisted next to the Chroma database): per-file hash, committed pages and
+# chunk IDs, so unchanged files are skipped and interrupted ones resume from the last committed page
+INGEST_MANIFEST_PATH = os.path.join(DATA_DIR, "ingest_manifest", "manifest.sqlite3")
+
+# Bulk ingestion: parse, split, embed and write run as concurrent stages joined by bounded queues
+BULK_PARSE_WORKERS = 2  # files parsed at the same time
+BULK_QUEUE_SIZE = 4  # page windows buffered between two stages; bounds memory
+BULK_MAX_FILES = 10_000
+
+# PDF extraction
+PDF_PAGE_WINDOW = 16  # pages passed from parsing to chunking at a time in bulk ingestion
+# Pages are embedded in windows of about this many chunks, so one window fills every concurrent
+# embedding batch instead of leaving a single request in flight
+INGEST_WINDOW_CHUNKS = EMBEDDING_BATCH_SIZE * EMBEDDING_MAX_CONCURRENCY
+PDF_PARALLEL_EXTRACTION = True
+PDF_PARALLEL_MIN_PAGES = 32  # smaller PDFs are parsed in-process
+PDF_EXTRACT_WORKERS = os.cpu_count() or 1
+PDF_PAGES_PER_TASK = 8
+PDF_MAX_INFLIGHT_TASKS = 2 * (os.cpu_count() or 1)
+
+# Uploads
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# Answer cache for /chat
+ANSWER_CACHE_MAX_ENTRIES = 1000
+ANSWER_CACHE_TTL_SECONDS = 3600  # 0 keeps answers until the knowledge base changes
+ANSWER_CACHE_MAX_DISTANCE = 0.05  # cosine distance for reusing a similar question's answer; 0 disables
+
+# Keyword (BM25) and hybrid retrieval
+KEYWORD_INDEX_DIR = os.path.join(DATA_DIR, "keyword_index")
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_CANDIDATE_MULTIPLIER = 4  # each retriever contributes k * multiplier candidates to fusion
+RRF_K = 60
+FILTER_CACHE_MAX_ENTRIES = 256  # chat filters whose matching chunk IDs are kept until the next write
+
+# Retrieval limits for chat requests; they also bound the pairwise de-duplication in context packing
+MAX_K = 50
+MAX_FETCH_K = 200
+
+# Maximal marginal relevance (diversity-aware) selection
+MMR_FETCH_K = 20  # candidates fetched once before picking a diverse top-k
+MMR_LAMBDA = 0.5  # 1.0 = pure relevance, 0.0 = maximum diversity
+
+# Context packing
+CONTEXT_TOKEN_BUDGET = 3000  # max context tokens sent to the LLM, regardless of k
+CHARS_PER_TOKEN = 4  # rough estimate used to count tokens without a tokenizer call
+
+# Precomputed summaries: map-reduce over each document's chunks after ingestion, merged per knowledge base
+SUMMARIES_ENABLED = True
+SUMMARY_STORE_PATH = os.path.join(DATA_DIR, "summaries", "summaries.sqlite3")
+SUMMARY_MAP_CHARS = 12000  # document text summarized per map call
+SUMMARY_REDUCE_FAN_IN = 8  # summaries merged per reduce call
+SUMMARY_MAX_CONCURRENCY = 4  # concurrent LLM calls while summarizing
+
+# Batch chat
+BATCH_CHAT_MAX_QUERIES = 100
+BATCH_CHAT_CONCURRENCY = 8  # concurrent LLM calls per batch request
@@ -0,0 +1,114 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from langchain_core.documents import Document
+
+import config
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count from character length"""
+    return max(1, math.ceil(len(text) / config.CHARS_PER_TOKEN)) if text else 0
+
+
+def _overlap_length(left: str, right: str, max_overlap: int, min_overlap: int = 20) -> int:
+    """Length of the longest suffix of left that is also a prefix of right"""
+    for size in range(min(max_overlap, len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_neighbors(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge adjacent chunks of the same page whose texts overlap"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    standalone = []
+    for item in items:
+        metadata = item["metadata"]
+        if "chunk_id" in metadata and ("document_id" in metadata or "filename" in metadata):
+            key = (metadata.get("document_id", metadata.get("filename")), metadata.get("page"))
+            groups.setdefault(key, []).append(item)
+        else:
+            standalone.append(item)
+
+    merged = list(standalone)
+    for group in groups.values():
+        group.sort(key=lambda item: item["metadata"]["chunk_id"])
+        current = group[0]
+        for item in group[1:]:
+            adjacent = item["metadata"]["chunk_id"] - current["last_chunk_id"] == 1
+            overlap = _overlap_length(current["text"], item["text"], config.CHUNK_OVERLAP * 2) if adjacent else 0
+            if overlap:
+                current = {
+                    **current,
+                    "text": current["text"] + item["text"][overlap:],
+                    "rank": min(current["rank"], item["rank"]),
+                    "last_chunk_id": item["metadata"]["chunk_id"],
+                    "trimmed_chars": current["trimmed_chars"] + overlap
+                }
+            else:
+                merged.append(current)
+                current = item
+        merged.append(current)
+    return merged
+
+
+def pack_context(items: Sequence[Union[Document, str]], token_budget: Optional[int] = None) -> Dict[str, Any]:
+    """Assemble retrieved chunks into context strings that fit a token budget
+
+    Items are assumed to be in relevance order. Exact duplicates are dropped,
+    overlapping neighbor chunks from the same page are merged, and chunks are
+    packed best-first until the budget is used up.
+    """
+    token_budget = config.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    input_tokens = 0
+
+    prepared = []
+    seen_texts = set()
+    for rank, item in enumerate(items):
+        text = item.page_content if isinstance(item, Document) else item
+        metadata = item.metadata if isinstance(item, Document) else {}
+        input_tokens += estimate_tokens(text)
+        if not text or text in seen_texts:
+            continue
+        seen_texts.add(text)
+        prepared.append({
+            "text": text,
+            "metadata": metadata,
+            "rank": rank,
+            "last_chunk_id": metadata.get("chunk_id"),
+            "trimmed_chars": 0
+        })
+
+    # Drop chunks whose text is fully contained in another retrieved chunk; texts are unique, so only
+    # longer ones can contain them. Still pairwise, which the request limits on k keep small.
+    longest_first = sorted(prepared, key=lambda item: len(item["text"]), reverse=True)
+    contained = set()
+    for position, item in enumerate(longest_first):
+        for other in longest_first[:position]:
+            if len(other["text"]) > len(item["text"]) and item["text"] in other["text"]:
+                contained.add(id(item))
+                break
+    prepared = [item for item in prepared if id(item) not in contained]
+
+    candidates = sorted(_merge_neighbors(prepared), key=lambda item: item["rank"])
+
+    context, packed_tokens = [], 0
+    for item in candidates:
+        tokens = estimate_tokens(item["text"])
+        if packed_tokens + tokens <= token_budget:
+            context.append(item["text"])
+            packed_tokens += tokens
+        elif not context:
+            # Always keep the best chunk, truncated to the budget
+            text = item["text"][:token_budget * config.CHARS_PER_TOKEN]
+            context.append(text)
+            packed_tokens += estimate_tokens(text)
+
+    return {
+        "context": context,
+        "tokens_packed": packed_tokens,
+        "tokens_dropped": max(0, input_tokens - packed_tokens),
+        "chunks_retrieved": len(items),
+        "chunks_packed": len(context)
+    }
@@ -1,65 +1,456 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 from langchain_community.vectorstores import Chroma
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional, Tuple
 import config
+from keyword_index import BM25Index, reciprocal_rank_fusion
+from embeddings import create_embeddings
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from embedding_pipeline import BatchedEmbeddings
+from metrics import StageTimer
 
 
-class ChromaDBManager:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(
-            path=config.CHROMA_DB_PATH,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+class EmbeddingMismatchError(ValueError):
+    """An existing collection was built with a different embedding model or dimension"""
+
+
+def create_client():
+    """Open the persistent Chroma client"""
+    return chromadb.PersistentClient(
+        path=config.CHROMA_DB_PATH,
+        settings=Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
         )
+    )
+
+
+def create_embedding_stack() -> Tuple[Embeddings, str, Optional[int]]:
+    """Build the configured embedding model behind batching and the persistent cache
+
+    Returns (embeddings, model_id, dimension).
+    """
+    # Initialize embeddings from the configured provider (Gemini or local)
+    embeddings, embedding_model, embedding_dim = create_embeddings()
+
+    # Embed large chunk lists in concurrent, rate-limited batches
+    embeddings = BatchedEmbeddings(
+        embeddings,
+        batch_size=config.EMBEDDING_BATCH_SIZE,
+        max_concurrency=config.EMBEDDING_MAX_CONCURRENCY,
+        requests_per_second=config.EMBEDDING_REQUESTS_PER_SECOND,
+        max_retries=config.EMBEDDING_MAX_RETRIES,
+        backoff_base=config.EMBEDDING_RETRY_BACKOFF
+    )
 
-        # Initialize embeddings with Gemini
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model=config.EMBEDDING_MODEL,
-            google_api_key=config.GEMINI_API_KEY
+    # Only chunks that miss the cache are sent to the embedding API
+    if config.EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            EmbeddingCache(
+                path=config.EMBEDDING_CACHE_PATH,
+                model_name=embedding_model,
+                max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES
+            )
         )
 
+    return embeddings, embedding_model, embedding_dim
+
+
+class ChromaDBManager:
+    def __init__(self, collection_name: str = None, client=None,
+                 embedding_stack: Tuple[Embeddings, str, Optional[int]] = None, reset: bool = False):
+        """With reset, any stored collection and indexes are dropped unopened and unvalidated"""
+        self.collection_name = collection_name or config.COLLECTION_NAME
+
+        # The client and embedding stack can be shared by managers of several collections
+        self.client = client or create_client()
+        self.embedding_stack = embedding_stack or create_embedding_stack()
+        self.embeddings, self.embedding_model, self.embedding_dim = self.embedding_stack
+
         # Initialize text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=config.CHUNK_SIZE,
+            chunk_overlap=config.CHUNK_OVERLAP,
             length_function=len,
         )
 
         # Initialize or get existing collection
+        if reset:
+            self._drop_collection()
         self.vectorstore = self._get_or_create_collection()
 
+        # Collection stats are kept in memory and updated on every write
+        self._stats = None
+        self._stats_refreshed_at = 0.0
+        self._stats_lock = threading.Lock()
+
+        # Chunk IDs matching recent chat filters, for keyword search; dropped on every write
+        self._filter_ids: "OrderedDict[str, frozenset]" = OrderedDict()
+        self._filter_generation = 0
+        self._filter_lock = threading.Lock()
+
+        # BM25 keyword index over the same chunks, persisted next to the Chroma database
+        self.keyword_index = BM25Index(
+            path=os.path.join(config.KEYWORD_INDEX_DIR, f"{self.collection_name}.pkl"),
+            k1=config.BM25_K1,
+            b=config.BM25_B
+        )
+        self._load_keyword_index()
+
+        if reset:
+            self.keyword_index.clear()
+            self.save_keyword_index()
+
+    def _drop_collection(self):
+        """Delete the stored collection, whatever embeddings it was built with"""
+        try:
+            self.client.delete_collection(self.collection_name)
+            print(f"Collection '{self.collection_name}' deleted successfully")
+        except Exception:
+            # Nothing stored under this name yet
+            pass
+
+    def _collection_metadata(self) -> dict:
+        """Metadata recorded on new collections so later runs can detect mixed embeddings"""
+        metadata = {"embedding_model": self.embedding_model}
+        if self.embedding_dim:
+            metadata["embedding_dim"] = self.embedding_dim
+        return metadata
+
+    def _validate_embeddings(self, collection):
+        """Reject an existing collection built with a different embedding model or dimension"""
+        metadata = collection.metadata or {}
+        stored_model = metadata.get("embedding_model")
+        stored_dim = metadata.get("embedding_dim")
+        if stored_dim is None and collection.count() > 0:
+            stored = collection.peek(1)["embeddings"]
+            stored_dim = len(stored[0]) if stored is not None and len(stored) else None
+
+        if stored_dim and self.embedding_dim and stored_dim != self.embedding_dim:
+            raise EmbeddingMismatchError(
+                f"Collection '{collection.name}' stores {stored_dim}-dimensional embeddings, but the "
+                f"'{config.EMBEDDING_PROVIDER}' provider produces {self.embedding_dim}-dimensional ones. "
+                f"Use a different knowledge base or clear this one."
+            )
+        if stored_model and stored_model != self.embedding_model:
+            raise EmbeddingMismatchError(
+                f"Collection '{collection.name}' was built with {stored_model}, not {self.embedding_model}. "
+                f"Use a different knowledge base or clear this one."
+            )
+
+    @staticmethod
+    def _hnsw_configuration() -> dict:
+        """HNSW index settings from config, in Chroma's collection configuration format"""
+        return {
+            "hnsw": {
+                "space": config.HNSW_SPACE,
+                "max_neighbors": config.HNSW_M,
+                "ef_construction": config.HNSW_CONSTRUCTION_EF,
+                "ef_search": config.HNSW_SEARCH_EF
+            }
+        }
+
+    def _apply_hnsw_settings(self, collection):
+        """Apply the configured search ef to an existing collection and warn about fixed settings that differ"""
+        hnsw = (collection.configuration or {}).get("hnsw") or {}
+        for key, expected in (("space", config.HNSW_SPACE), ("max_neighbors", config.HNSW_M),
+                              ("ef_construction", config.HNSW_CONSTRUCTION_EF)):
+            if hnsw.get(key) is not None and hnsw[key] != expected:
+                print(f"Collection '{collection.name}' was built with HNSW {key}={hnsw[key]}, not {expected}; "
+                      f"clear the knowledge base to rebuild it with the new setting")
+        if hnsw.get("ef_search") != config.HNSW_SEARCH_EF:
+            try:
+                collection.modify(configuration={"hnsw": {"ef_search": config.HNSW_SEARCH_EF}})
+            except Exception as e:
+                print(f"Error updating HNSW search ef: {e}")
+
     def _get_or_create_collection(self):
         """Get existing collection or create new one"""
+        existing_collection = None
         try:
-            # Try to get existing collection first
+            existing_collection = self.client.get_collection(self.collection_name)
+            print(f"Using existing collection: {self.collection_name}")
+        except Exception:
+            print(f"Creating new collection: {self.collection_name}")
+
+        if existing_collection is not None:
+            self._validate_embeddings(existing_collection)
+            self._apply_hnsw_settings(existing_collection)
+        else:
+            # Created here rather than by the Chroma constructor so the HNSW configuration applies
             try:
-                existing_collection = self.client.get_collection(config.COLLECTION_NAME)
-                print(f"Using existing collection: {config.COLLECTION_NAME}")
-            except:
-                # Collection doesn't exist, will be created by Chroma constructor
-                print(f"Creating new collection: {config.COLLECTION_NAME}")
-                pass
-            
+                self.client.get_or_create_collection(
+                    self.collection_name,
+                    configuration=self._hnsw_configuration(),
+                    metadata=self._collection_metadata()
+                )
+            except Exception as e:
+                print(f"Error creating collection: {e}")
+
+        try:
             return Chroma(
                 client=self.client,
-                collection_name=config.COLLECTION_NAME,
+                collection_name=self.collection_name,
                 embedding_function=self.embeddings,
-                persist_directory=config.CHROMA_DB_PATH
+                persist_directory=config.CHROMA_DB_PATH,
+                collection_metadata=self._collection_metadata()
             )
         except Exception as e:
             print(f"Error initializing collection: {e}")
             # Try once more
             return Chroma(
                 client=self.client,
-                collection_name=config.COLLECTION_NAME,
+                collection_name=self.collection_name,
                 embedding_function=self.embeddings,
-                persist_directory=config.CHROMA_DB_PATH
+                persist_directory=config.CHROMA_DB_PATH,
+                collection_metadata=self._collection_metadata()
+            )
+
+    def _load_keyword_index(self):
+        """Load the saved keyword index, rebuilding it from the collection if it is missing"""
+        try:
+            if self.keyword_index.load():
+                return
+            total = self.collection.count()
+            if total == 0:
+                return
+            print(f"Rebuilding keyword index from {total} stored chunks")
+            for offset in range(0, total, 1000):
+                batch = self.collection.get(include=["documents"], limit=1000, offset=offset)
+                self.keyword_index.add(batch["ids"], batch["documents"])
+            self.keyword_index.save()
+        except Exception as e:
+            print(f"Error loading keyword index: {e}")
+
+    def save_keyword_index(self):
+        """Persist pending keyword index changes"""
+        try:
+            self.keyword_index.save()
+        except Exception as e:
+            print(f"Error saving keyword index: {e}")
+
+    @property
+    def collection(self):
+        """Underlying Chroma collection of the vector store"""
+        return self.vectorstore._collection
+
+    @staticmethod
+    def _stable_id(*parts) -> str:
+        """Deterministic ID from the given parts"""
+        payload = "\0".join(str(part) for part in parts).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:32]
+
+    @staticmethod
+    def estimate_chunks(text: str) -> int:
+        """Approximate number of chunks a text splits into, for sizing ingestion windows without splitting twice"""
+        step = max(1, config.CHUNK_SIZE - config.CHUNK_OVERLAP)
+        return -(-len(text) // step) if text and text.strip() else 0
+
+    def _build_chunks(self, texts: List[str], metadatas: Optional[List[dict]] = None):
+        """Split texts into chunks with stable IDs and metadata"""
+        ids, documents, document_metadatas = [], [], []
+        seen = set()
+
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+
+            base_metadata = metadatas[i] if metadatas and i < len(metadatas) else {}
+            filename = base_metadata.get("filename")
+            page = base_metadata.get("page", i)
+            # Chunks of the same file share a document ID across re-uploads
+            document_id = self._stable_id(filename) if filename else self._stable_id(text)
+
+            chunks = self.text_splitter.split_text(text)
+            for chunk_idx, chunk in enumerate(chunks):
+                chunk_uid = self._stable_id(filename or document_id, page, chunk)
+                if chunk_uid in seen:
+                    continue
+                seen.add(chunk_uid)
+
+                metadata = {
+                    "document_id": document_id,
+                    "chunk_id": chunk_idx,
+                    "source": f"document_{i}"
+                }
+                metadata.update(base_metadata)
+                ids.append(chunk_uid)
+                documents.append(chunk)
+                document_metadatas.append(metadata)
+
+        return ids, documents, document_metadatas
+
+    def prepare_chunks(self, texts: List[str], metadatas: Optional[List[dict]] = None,
+                       timer: Optional[StageTimer] = None) -> dict:
+        """Split texts into chunks and separate new chunks from ones that are already stored"""
+        timer = timer or StageTimer()
+        with timer.stage("split"):
+            ids, documents, document_metadatas = self._build_chunks(texts, metadatas)
+        chunks = {
+            "ids": ids,
+            "new_ids": [], "new_documents": [], "new_metadatas": [],
+            "unchanged_ids": [], "unchanged_metadatas": []
+        }
+        if not ids:
+            return chunks
+
+        with timer.stage("write"):
+            existing = set(self.collection.get(ids=ids, include=[])["ids"])
+        for chunk_uid, document, metadata in zip(ids, documents, document_metadatas):
+            if chunk_uid in existing:
+                chunks["unchanged_ids"].append(chunk_uid)
+                chunks["unchanged_metadatas"].append(metadata)
+            else:
+                chunks["new_ids"].append(chunk_uid)
+                chunks["new_documents"].append(document)
+                chunks["new_metadatas"].append(metadata)
+        return chunks
+
+    def write_chunks(self, chunks: dict, embeddings: List[List[float]]):
+        """Store prepared chunks with the embeddings of their new chunks"""
+        # Refresh metadata (e.g. file_hash) of unchanged chunks without re-embedding them
+        if chunks["unchanged_ids"]:
+            self.collection.update(ids=chunks["unchanged_ids"], metadatas=chunks["unchanged_metadatas"])
+
+        if chunks["new_ids"]:
+            self.collection.upsert(
+                ids=chunks["new_ids"],
+                embeddings=embeddings,
+                metadatas=chunks["new_metadatas"],
+                documents=chunks["new_documents"]
             )
+            self._adjust_count(len(chunks["new_ids"]))
+            self.keyword_index.add(chunks["new_ids"], chunks["new_documents"])
+        if chunks["unchanged_ids"] or chunks["new_ids"]:
+            self._invalidate_filters()
+
+    def upsert_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None,
+                         timer: Optional[StageTimer] = None) -> dict:
+        """Add only chunks that are not already stored, keyed by stable chunk IDs"""
+        timer = timer or StageTimer()
+        chunks = self.prepare_chunks(texts, metadatas, timer)
+        if not chunks["ids"]:
+            return {"ids": [], "added": 0, "skipped": 0}
+
+        # Embed and write separately so each stage can be timed
+        embeddings = []
+        if chunks["new_ids"]:
+            with timer.stage("embed"):
+                embeddings = self.embeddings.embed_documents(chunks["new_documents"])
+        with timer.stage("write"):
+            self.write_chunks(chunks, embeddings)
+
+        return {"ids": chunks["ids"], "added": len(chunks["new_ids"]), "skipped": len(chunks["unchanged_ids"])}
+
+    def _delete_ids(self, ids: List[str]):
+        """Delete chunks by ID from the collection, cached stats and keyword index in batches"""
+        for start in range(0, len(ids), config.DELETE_BATCH_SIZE):
+            batch = ids[start:start + config.DELETE_BATCH_SIZE]
+            self.collection.delete(ids=batch)
+            self._adjust_count(-len(batch))
+            self.keyword_index.remove(batch)
+        self._invalidate_filters()
+
+    def delete_where(self, where: dict) -> int:
+        """Delete every chunk matching a metadata filter, one batch at a time"""
+        deleted = 0
+        while True:
+            batch = self.collection.get(where=where, limit=config.DELETE_BATCH_SIZE, include=[])["ids"]
+            if not batch:
+                break
+            self._delete_ids(batch)
+            deleted += len(batch)
+        if deleted:
+            self.save_keyword_index()
+        return deleted
+
+    def delete_by_filename(self, filename: str) -> int:
+        """Delete all chunks of a file"""
+        return self.delete_where({"filename": filename})
+
+    def delete_by_document_id(self, document_id: str) -> int:
+        """Delete all chunks of a document"""
+        return self.delete_where({"document_id": document_id})
+
+    def document_id_for(self, filename: str) -> str:
+        """Document ID shared by every chunk of a file"""
+        return self._stable_id(filename)
+
+    def list_documents(self) -> List[dict]:
+        """List stored documents with their chunk and page counts"""
+        documents = {}
+        total = self.collection.count()
+        for offset in range(0, total, 1000):
+            batch = self.collection.get(include=["metadatas"], limit=1000, offset=offset)
+            for metadata in batch["metadatas"]:
+                metadata = metadata or {}
+                document_id = metadata.get("document_id")
+                document = documents.setdefault(document_id, {
+                    "document_id": document_id,
+                    "filename": metadata.get("filename"),
+                    "chunks": 0,
+                    "pages": set()
+                })
+                document["chunks"] += 1
+                if metadata.get("page") is not None:
+                    document["pages"].add(metadata["page"])
+        return [
+            {**document, "pages": len(document["pages"])}
+            for document in sorted(documents.values(), key=lambda item: str(item["filename"]))
+        ]
+
+    def get_document_chunks(self, document_id: str) -> List[Tuple[str, str, dict]]:
+        """Get (chunk ID, text, metadata) of every chunk of a document in reading order"""
+        results = self.collection.get(where={"document_id": document_id}, include=["documents", "metadatas"])
+        chunks = [
+            (chunk_id, document, metadata or {})
+            for chunk_id, document, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+        return sorted(chunks, key=lambda chunk: (chunk[2].get("page", 0), chunk[2].get("chunk_id", 0)))
+
+    def remove_stale_chunks(self, filename: str, keep_ids: List[str]) -> int:
+        """Delete chunks of a file that are no longer part of its latest version"""
+        try:
+            existing = self.collection.get(where={"filename": filename}, include=[])["ids"]
+            keep = set(keep_ids)
+            stale = [chunk_uid for chunk_uid in existing if chunk_uid not in keep]
+            if stale:
+                self._delete_ids(stale)
+                self.save_keyword_index()
+                print(f"Removed {len(stale)} stale chunks from {filename}")
+            return len(stale)
+        except Exception as e:
+            print(f"Error removing stale chunks: {e}")
+            return 0
+
+    def reindex_chunks(self, ids: List[str]) -> int:
+        """Add stored chunks that are missing from the keyword index, e.g. after a crash
+        between writing them and saving the index"""
+        missing = [chunk_uid for chunk_uid in ids if chunk_uid not in self.keyword_index]
+        for start in range(0, len(missing), 1000):
+            batch = self.collection.get(ids=missing[start:start + 1000], include=["documents"])
+            self.keyword_index.add(batch["ids"], batch["documents"])
+        return len(missing)
+
+    def has_file_hash(self, file_hash: str) -> bool:
+        """Check whether a file with this content hash is already stored"""
+        try:
+            return bool(self.collection.get(where={"file_hash": file_hash}, limit=1, include=[])["ids"])
+        except Exception as e:
+            print(f"Error checking file hash: {e}")
+            return False
 
     def add_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None):
         """Add documents to the vector store"""
@@ -68,38 +459,14 @@ class ChromaDBManager:
                 print("No texts provided to add")
                 return False
 
-            # Split texts into chunks
-            documents = []
-            document_metadatas = []
-
-            for i, text in enumerate(texts):
-                if not text or not text.strip():
-                    continue
-                    
-                chunks = self.text_splitter.split_text(text)
-                documents.extend(chunks)
-
-                # Add metadata for each chunk
-                for chunk_idx, chunk in enumerate(chunks):
-                    metadata = {
-                        "document_id": i,
-                        "chunk_id": chunk_idx,
-                        "source": f"document_{i}"
-                    }
-                    if metadatas and i < len(metadatas):
-                        metadata.update(metadatas[i])
-                    document_metadatas.append(metadata)
-
-            if not documents:
+            result = self.upsert_documents(texts, metadatas)
+            self.save_keyword_index()
+            if not result["ids"]:
                 print("No valid chunks created from provided texts")
                 return False
 
-            # Add to vector store
-            self.vectorstore.add_texts(
-                texts=documents,
-                metadatas=document_metadatas
-            )
-            print(f"Added {len(documents)} chunks from {len(texts)} documents")
+            print(f"Added {result['added']} chunks from {len(texts)} documents "
+                  f"({result['skipped']} unchanged chunks skipped)")
             return True
         except Exception as e:
             print(f"Error adding documents: {e}")
@@ -114,6 +481,176 @@ class ChromaDBManager:
             print(f"Error searching documents: {e}")
             return []
 
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the collection's embedding model"""
+        return self.embeddings.embed_query(query)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in a single embedding call where supported"""
+        if hasattr(self.embeddings, "embed_queries"):
+            return self.embeddings.embed_queries(queries)
+        return [self.embeddings.embed_query(query) for query in queries]
+
+    def batch_similarity_search_by_vector(self, embeddings: List[List[float]], k: int = 3,
+                                          where: Optional[dict] = None) -> List[List[Document]]:
+        """Run several vector searches in one Chroma query"""
+        if not embeddings:
+            return []
+        results = self.collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas"]
+        )
+        return [
+            [
+                Document(id=chunk_id, page_content=document, metadata=metadata or {})
+                for chunk_id, document, metadata in zip(ids, documents, metadatas)
+            ]
+            for ids, documents, metadatas in zip(results["ids"], results["documents"], results["metadatas"])
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 3, where: Optional[dict] = None):
+        """Search for similar documents using a precomputed query embedding, optionally filtered by metadata"""
+        try:
+            return self.vectorstore.similarity_search_by_vector(embedding, k=k, filter=where)
+        except Exception as e:
+            print(f"Error searching documents by vector: {e}")
+            return []
+
+    def _query_by_vector(self, embedding: List[float], n_results: int, include_embeddings: bool = False,
+                         where: Optional[dict] = None) -> List[Tuple[Document, float, Optional[List[float]]]]:
+        """Query the collection directly, returning documents with their IDs, distances and stored embeddings"""
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        results = self.collection.query(
+            query_embeddings=[embedding], n_results=n_results, where=where, include=include
+        )
+        embeddings = results["embeddings"][0] if include_embeddings else [None] * len(results["ids"][0])
+        return [
+            (Document(id=chunk_id, page_content=document, metadata=metadata or {}), distance, vector)
+            for chunk_id, document, metadata, distance, vector in zip(
+                results["ids"][0], results["documents"][0], results["metadatas"][0],
+                results["distances"][0], embeddings
+            )
+        ]
+
+    def _matching_ids(self, where: Optional[dict]) -> Optional[frozenset]:
+        """IDs of the chunks matching a metadata filter, or None when there is no filter
+
+        The keyword index holds no metadata, so the IDs come from Chroma; they are cached per filter
+        until the next write, so repeated filters do not fetch every matching ID per query.
+        """
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        with self._filter_lock:
+            ids = self._filter_ids.get(key)
+            if ids is not None:
+                self._filter_ids.move_to_end(key)
+                return ids
+            generation = self._filter_generation
+
+        ids = frozenset(self.collection.get(where=where, include=[])["ids"])
+        with self._filter_lock:
+            # A write while fetching may have changed the result; use it once but do not keep it
+            if generation == self._filter_generation:
+                self._filter_ids[key] = ids
+                while len(self._filter_ids) > config.FILTER_CACHE_MAX_ENTRIES:
+                    self._filter_ids.popitem(last=False)
+        return ids
+
+    def _invalidate_filters(self):
+        """Forget cached filter matches; called after a write so no fetch that overlapped it is kept"""
+        with self._filter_lock:
+            self._filter_generation += 1
+            self._filter_ids.clear()
+
+    def _get_embeddings(self, ids: List[str]) -> dict:
+        """Fetch stored embeddings by chunk ID"""
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["embeddings"])
+        return dict(zip(results["ids"], results["embeddings"]))
+
+    @staticmethod
+    def _select_mmr(embedding: List[float], candidates: List[Tuple[Document, List[float]]],
+                    k: int, lambda_mult: float) -> List[Document]:
+        """Pick a diverse top-k from candidates with maximal marginal relevance"""
+        if not candidates:
+            return []
+        selected = maximal_marginal_relevance(
+            np.array(embedding, dtype=np.float32),
+            [vector for _, vector in candidates],
+            k=k,
+            lambda_mult=lambda_mult
+        )
+        return [candidates[i][0] for i in selected]
+
+    def mmr_search_by_vector(self, embedding: List[float], k: int = 3, fetch_k: int = 20,
+                             lambda_mult: float = 0.5, where: Optional[dict] = None) -> List[Document]:
+        """Fetch fetch_k candidates once and select a diverse top-k using their stored embeddings"""
+        try:
+            candidates = self._query_by_vector(embedding, max(fetch_k, k), include_embeddings=True, where=where)
+            return self._select_mmr(embedding, [(doc, vector) for doc, _, vector in candidates], k, lambda_mult)
+        except Exception as e:
+            print(f"Error in MMR search: {e}")
+            return []
+
+    def _get_documents(self, ids: List[str]) -> List[Document]:
+        """Fetch stored chunks by ID, preserving the order of ids"""
+        if not ids:
+            return []
+        results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: Document(id=chunk_id, page_content=document, metadata=metadata or {})
+            for chunk_id, document, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+
+    def keyword_search(self, query: str, k: int = 3, where: Optional[dict] = None) -> List[Document]:
+        """Search chunks with the BM25 keyword index, optionally only those matching a metadata filter"""
+        try:
+            hits = self.keyword_index.search(query, k=k, ids=self._matching_ids(where))
+            return self._get_documents([chunk_id for chunk_id, _ in hits])
+        except Exception as e:
+            print(f"Error in keyword search: {e}")
+            return []
+
+    def hybrid_search(self, query: str, embedding: List[float], k: int = 3, use_mmr: bool = False,
+                      fetch_k: int = 20, lambda_mult: float = 0.5, where: Optional[dict] = None) -> List[Document]:
+        """Fuse vector and BM25 rankings with reciprocal-rank fusion, optionally diversified with MMR"""
+        try:
+            candidate_k = max(k * config.HYBRID_CANDIDATE_MULTIPLIER, fetch_k if use_mmr else k)
+            dense = self._query_by_vector(embedding, candidate_k, include_embeddings=use_mmr, where=where)
+            keyword = self.keyword_index.search(query, k=candidate_k, ids=self._matching_ids(where))
+
+            fused = reciprocal_rank_fusion(
+                [[doc.id for doc, _, _ in dense], [chunk_id for chunk_id, _ in keyword]],
+                k=config.RRF_K
+            )[:max(fetch_k, k) if use_mmr else k]
+
+            dense_docs = {doc.id: doc for doc, _, _ in dense}
+            missing = [chunk_id for chunk_id, _ in fused if chunk_id not in dense_docs]
+            fetched = {doc.id: doc for doc in self._get_documents(missing)}
+            documents = [
+                dense_docs.get(chunk_id) or fetched[chunk_id]
+                for chunk_id, _ in fused
+                if chunk_id in dense_docs or chunk_id in fetched
+            ]
+            if not use_mmr:
+                return documents
+
+            # Diversify the fused candidates using stored embeddings; only keyword-only hits are fetched
+            vectors = {doc.id: vector for doc, _, vector in dense}
+            vectors.update(self._get_embeddings([doc.id for doc in documents if doc.id not in vectors]))
+            candidates = [(doc, vectors[doc.id]) for doc in documents if doc.id in vectors]
+            return self._select_mmr(embedding, candidates, k, lambda_mult)
+        except Exception as e:
+            print(f"Error in hybrid search: {e}")
+            return []
+
     def similarity_search_with_score(self, query: str, k: int = 3):
         """Search for similar documents with similarity scores"""
         try:
@@ -126,29 +663,60 @@ class ChromaDBManager:
     def delete_collection(self):
         """Delete the collection"""
         try:
-            self.client.delete_collection(config.COLLECTION_NAME)
-            print(f"Collection '{config.COLLECTION_NAME}' deleted successfully")
+            self.client.delete_collection(self.collection_name)
+            print(f"Collection '{self.collection_name}' deleted successfully")
             
             # Reinitialize the vectorstore after deletion
             self.vectorstore = self._get_or_create_collection()
+            self.invalidate_stats()
+            self._invalidate_filters()
+            self.keyword_index.clear()
+            self.save_keyword_index()
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
             return False
 
+    def _refresh_stats(self):
+        """Reload collection stats from storage"""
+        collection = self.collection
+        self._stats = {
+            "name": collection.name,
+            "count": collection.count(),
+            "metadata": collection.metadata
+        }
+        self._stats_refreshed_at = time.monotonic()
+
+    def _adjust_count(self, delta: int):
+        """Apply a known change to the cached chunk count"""
+        with self._stats_lock:
+            if self._stats is not None:
+                self._stats["count"] = max(0, self._stats["count"] + delta)
+
+    def invalidate_stats(self):
+        """Force the next stats read to go to storage"""
+        with self._stats_lock:
+            self._stats = None
+
     def get_collection_info(self):
-        """Get information about the collection"""
+        """Get information about the collection from in-memory stats, refreshing them lazily"""
         try:
-            collection = self.client.get_collection(config.COLLECTION_NAME)
-            return {
-                "name": collection.name,
-                "count": collection.count(),
-                "metadata": collection.metadata
-            }
+            with self._stats_lock:
+                stale = (
+                    self._stats is None
+                    or time.monotonic() - self._stats_refreshed_at > config.COLLECTION_STATS_TTL_SECONDS
+                )
+                if stale:
+                    self._refresh_stats()
+                return dict(self._stats)
         except Exception as e:
             # Collection doesn't exist or other error - return empty info
             return {
-                "name": config.COLLECTION_NAME,
+                "name": self.collection_name,
                 "count": 0,
                 "metadata": {}
-            }
\ No newline at end of file
+            }
+
+    def is_empty(self) -> bool:
+        """Check whether the collection has no chunks, without a storage round trip when stats are fresh"""
+        return self.get_collection_info().get("count", 0) == 0
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingCache:
+    """Persistent, size-bounded embedding cache keyed by text and model name"""
+
+    def __init__(self, path: str, model_name: str, max_entries: int = 100_000):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key(self, text: str, namespace: str = "document") -> str:
+        """Build the cache key for a text"""
+        payload = f"{self.model_name}\0{namespace}\0{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, texts: List[str], namespace: str = "document") -> List[Optional[List[float]]]:
+        """Look up cached vectors, returning None for every miss"""
+        keys = [self.key(text, namespace) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        return [self._decode(found[key]) if key in found else None for key in keys]
+
+    def put_many(self, texts: List[str], vectors: List[List[float]], namespace: str = "document"):
+        """Store vectors and evict the least recently used entries over the limit"""
+        if not texts:
+            return
+        now = time.time()
+        rows = [(self.key(text, namespace), self._encode(vector), now) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._size += self._conn.total_changes - before
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop the oldest entries once the cache grows past max_entries"""
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._size -= overflow
+
+    def clear(self):
+        """Remove every cached vector"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the underlying model"""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors where possible"""
+        vectors = self.cache.get_many(texts)
+
+        # Deduplicate misses so repeated chunks are only embedded once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        self.hits += len(texts) - sum(1 for vector in vectors if vector is None)
+        self.misses += len(missing)
+
+        if missing:
+            new_vectors = self.underlying.embed_documents(missing)
+            self.cache.put_many(missing, new_vectors)
+            computed = dict(zip(missing, new_vectors))
+            vectors = [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing a cached vector when available"""
+        cached = self.cache.get_many([text], namespace="query")[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many([text], [vector], namespace="query")
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, sending only cache misses to the underlying model in one call"""
+        vectors = self.cache.get_many(texts, namespace="query")
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        self.hits += len(texts) - sum(1 for vector in vectors if vector is None)
+        self.misses += len(missing)
+
+        if missing:
+            if hasattr(self.underlying, "embed_queries"):
+                new_vectors = self.underlying.embed_queries(missing)
+            else:
+                new_vectors = [self.underlying.embed_query(text) for text in missing]
+            self.cache.put_many(missing, new_vectors, namespace="query")
+            computed = dict(zip(missing, new_vectors))
+            vectors = [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+        return vectors
+
+    def get_stats(self) -> dict:
+        """Get cache hit/miss statistics"""
+        return {
+            "entries": len(self.cache),
+            "max_entries": self.cache.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
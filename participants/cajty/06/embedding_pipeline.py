@@ -0,0 +1,126 @@
+import functools
+import inspect
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that embeds batches concurrently with rate limiting and retries"""
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        requests_per_second: float = 0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        on_progress: Optional[Callable[[dict], None]] = None
+    ):
+        self.underlying = underlying
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.on_progress = on_progress
+        self.rate_limiter = TokenBucket(requests_per_second)
+
+    def _call_with_retry(self, func, *args):
+        """Call the embedding API, retrying with exponential backoff and jitter"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+                print(f"Embedding request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in concurrent batches, preserving input order"""
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        progress = {"batches_done": 0, "chunks_done": 0}
+        progress_lock = threading.Lock()
+        started = time.perf_counter()
+
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            vectors = self._call_with_retry(self.underlying.embed_documents, batch)
+            with progress_lock:
+                progress["batches_done"] += 1
+                progress["chunks_done"] += len(batch)
+                elapsed = time.perf_counter() - started
+                report = {
+                    "batches_done": progress["batches_done"],
+                    "batches_total": len(batches),
+                    "chunks_done": progress["chunks_done"],
+                    "chunks_total": len(texts),
+                    "elapsed": elapsed,
+                    "chunks_per_second": progress["chunks_done"] / elapsed if elapsed > 0 else 0.0
+                }
+            print(f"Embedded batch {report['batches_done']}/{report['batches_total']} "
+                  f"({report['chunks_done']}/{report['chunks_total']} chunks, "
+                  f"{report['chunks_per_second']:.1f} chunks/s)")
+            if self.on_progress:
+                self.on_progress(report)
+            return vectors
+
+        if len(batches) == 1:
+            return embed_batch(batches[0])
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            results = list(executor.map(embed_batch, batches))
+
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query with rate limiting and retries"""
+        return self._call_with_retry(self.underlying.embed_query, text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one request when the underlying model supports it"""
+        if not texts:
+            return []
+        if hasattr(self.underlying, "embed_queries"):
+            return self._call_with_retry(self.underlying.embed_queries, texts)
+        if "task_type" in inspect.signature(self.underlying.embed_documents).parameters:
+            # Gemini embeds queries and documents differently; ask for query embeddings in bulk
+            return self._call_with_retry(
+                functools.partial(self.underlying.embed_documents, task_type="RETRIEVAL_QUERY"), texts
+            )
+        return [self.embed_query(text) for text in texts]
@@ -0,0 +1,94 @@
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import config
+
+# Known output dimensions of remote embedding models
+GOOGLE_EMBEDDING_DIMENSIONS = {
+    "text-embedding-004": 768,
+    "models/text-embedding-004": 768,
+    "embedding-001": 768,
+    "models/embedding-001": 768,
+}
+
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashingEmbeddings(Embeddings):
+    """Local, offline embeddings from hashed character n-grams
+
+    Every text in a batch is embedded with the same handful of NumPy array
+    operations: n-gram hashes for the whole batch are computed at once and
+    accumulated into a (batch, dim) matrix, which is then L2-normalized.
+    """
+
+    def __init__(self, dim: int = 384, ngram_range: tuple = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one vectorized pass"""
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self.embed_matrix([text])[0].tolist()
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return matrix
+
+        # Concatenate the batch into one byte array and remember where each text starts
+        encoded = [f" {' '.join(text.lower().split())} ".encode("utf-8") for text in texts]
+        lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            if len(data) < n:
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(data, n)
+            starts = np.arange(len(windows))
+            rows = np.searchsorted(offsets, starts, side="right") - 1
+            # Keep only n-grams that do not cross the boundary between two texts
+            valid = starts + n <= offsets[rows + 1]
+            windows, rows = windows[valid], rows[valid]
+
+            hashes = np.full(len(windows), np.uint64(n), dtype=np.uint64)
+            with np.errstate(over="ignore"):
+                for column in range(n):
+                    hashes = hashes * _HASH_MULTIPLIER + windows[:, column]
+                hashes = hashes * _HASH_MIX
+
+            buckets = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            flat = np.bincount(rows * self.dim + buckets, weights=signs, minlength=matrix.size)
+            matrix += flat.reshape(matrix.shape).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+def create_embeddings():
+    """Create the base embedding model selected by config.EMBEDDING_PROVIDER
+
+    Returns (embeddings, model_id, dimension).
+    """
+    provider = config.EMBEDDING_PROVIDER
+    if provider == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        embeddings = GoogleGenerativeAIEmbeddings(
+            model=config.EMBEDDING_MODEL,
+            google_api_key=config.GEMINI_API_KEY
+        )
+        return embeddings, f"google:{config.EMBEDDING_MODEL}", GOOGLE_EMBEDDING_DIMENSIONS.get(config.EMBEDDING_MODEL)
+    if provider == "local":
+        embeddings = HashingEmbeddings(dim=config.LOCAL_EMBEDDING_DIM)
+        return embeddings, f"local:hashing-{config.LOCAL_EMBEDDING_DIM}", config.LOCAL_EMBEDDING_DIM
+    raise ValueError(f"Unknown embedding provider: {provider!r} (expected 'google' or 'local')")
@@ -0,0 +1,91 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class IngestionJobManager:
+    """Runs ingestion tasks on a worker pool and tracks their status"""
+
+    def __init__(self, max_workers: int = 2, max_finished_jobs: int = 200):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, task: Callable[..., Dict[str, Any]], filename: str, *args,
+               knowledge_base: Optional[str] = None, on_finish: Optional[Callable[[], None]] = None,
+               **kwargs) -> Dict[str, Any]:
+        """Queue a task; it is called with a progress_callback keyword argument
+
+        on_finish, if given, is called once the task has completed or failed.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "filename": filename,
+            "knowledge_base": knowledge_base,
+            "status": "queued",
+            "pages_total": None,
+            "pages_processed": 0,
+            "chunks_processed": 0,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+
+        self.executor.submit(self._run, job_id, task, args, kwargs, on_finish)
+        return self.get(job_id)
+
+    def _run(self, job_id: str, task: Callable, args: tuple, kwargs: dict, on_finish: Optional[Callable] = None):
+        """Execute a task and record its outcome"""
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = task(*args, progress_callback=lambda **progress: self._update(job_id, **progress), **kwargs)
+            if result.get("success"):
+                self._update(job_id, status="completed", result=result)
+            else:
+                self._update(job_id, status="failed", result=result, error=result.get("message"))
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e))
+        finally:
+            self._update(job_id, finished_at=time.time())
+            if on_finish:
+                on_finish()
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("completed", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, knowledge_base: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get snapshots of tracked jobs, newest first, optionally only those of one knowledge base"""
+        with self._lock:
+            return [
+                dict(job) for job in reversed(self._jobs.values())
+                if knowledge_base is None or job["knowledge_base"] == knowledge_base
+            ]
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for running ones"""
+        self.executor.shutdown(wait=True)
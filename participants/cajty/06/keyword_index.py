@@ -0,0 +1,142 @@
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[\-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping part numbers like E-1042 or v2.1 intact"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-process BM25 inverted index over chunk IDs, persisted with pickle"""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, chunk_id: str):
+        return chunk_id in self.doc_lengths
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        """Index chunks, skipping IDs that are already indexed"""
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                if chunk_id in self.doc_lengths:
+                    continue
+                tokens = tokenize(text)
+                frequencies: Dict[str, int] = defaultdict(int)
+                for token in tokens:
+                    frequencies[token] += 1
+                for term, tf in frequencies.items():
+                    self.postings[term][chunk_id] = tf
+                self.doc_terms[chunk_id] = list(frequencies)
+                self.doc_lengths[chunk_id] = len(tokens)
+                self.total_length += len(tokens)
+                self._dirty = True
+
+    def remove(self, ids: Iterable[str]):
+        """Remove chunks from the index"""
+        with self._lock:
+            for chunk_id in ids:
+                terms = self.doc_terms.pop(chunk_id, None)
+                if terms is None:
+                    continue
+                for term in terms:
+                    posting = self.postings.get(term)
+                    if posting is not None:
+                        posting.pop(chunk_id, None)
+                        if not posting:
+                            del self.postings[term]
+                self.total_length -= self.doc_lengths.pop(chunk_id)
+                self._dirty = True
+
+    def clear(self):
+        """Remove every chunk from the index"""
+        with self._lock:
+            self._reset()
+            self._dirty = True
+
+    def search(self, query: str, k: int = 10, ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Return the top-k (chunk_id, BM25 score) pairs for a query, optionally only among ids"""
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if n_docs == 0:
+                return []
+            avg_length = self.total_length / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in posting.items():
+                    if ids is not None and chunk_id not in ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, force: bool = False):
+        """Write the index to disk atomically if it changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            state = {
+                "postings": dict(self.postings),
+                "doc_lengths": self.doc_lengths,
+                "doc_terms": self.doc_terms,
+                "total_length": self.total_length
+            }
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def load(self) -> bool:
+        """Load the index from disk; returns False when no saved index exists"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with self._lock:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+            self.postings = defaultdict(dict, state["postings"])
+            self.doc_lengths = state["doc_lengths"]
+            self.doc_terms = state["doc_terms"]
+            self.total_length = state["total_length"]
+            self._dirty = False
+        return True
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists with reciprocal-rank fusion, best first"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
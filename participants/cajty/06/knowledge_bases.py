@@ -0,0 +1,156 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import config
+
+if TYPE_CHECKING:
+    from rag_service import RAGSystem
+
+# Chroma collection names: 3-63 characters, alphanumeric at both ends, no path separators
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{1,61}[A-Za-z0-9]$")
+
+
+def validate_name(name: Optional[str]) -> str:
+    """Return the knowledge base name to use, or raise ValueError if it is not a valid collection name"""
+    if not name:
+        return config.COLLECTION_NAME
+    if not _NAME_PATTERN.match(name) or ".." in name:
+        raise ValueError(
+            f"Invalid knowledge base name: {name!r} (use 3-63 letters, digits, '.', '_' or '-', "
+            f"starting and ending with a letter or digit)"
+        )
+    return name
+
+
+class KnowledgeBaseRegistry:
+    """Opens one RAGSystem per knowledge base on first use and keeps a bounded LRU of them
+
+    The Chroma client, embedding stack, LLM client and thread pool are shared, so an open
+    knowledge base only costs its collection handle, keyword index and answer cache.
+    Knowledge bases pinned by a running write (ingestion jobs, deletes, clears) are never
+    evicted, so a second instance never writes the same collection and index files.
+    """
+
+    def __init__(self, max_open: int = 32):
+        self.max_open = max_open
+        self.client = None
+        self.embedding_stack = None
+        self.llm = None
+        self.executor = None
+        self.ready = False
+        self._open: "OrderedDict[str, RAGSystem]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._opening: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._shared_lock = threading.Lock()
+
+    def _ensure_shared(self):
+        """Create the shared Chroma client, embeddings, LLM client and pool on first use"""
+        with self._shared_lock:
+            if self.client is not None:
+                return
+            # Imported here: Chroma and LangChain dominate startup time, so they load on first use
+            import database
+            import rag_service
+            self.embedding_stack = database.create_embedding_stack()
+            self.llm = rag_service.create_llm()
+            self.executor = rag_service.create_executor()
+            self.client = database.create_client()
+
+    def warm_up(self) -> "RAGSystem":
+        """Load heavy dependencies and open the default knowledge base ahead of the first request"""
+        return self.get()
+
+    def get(self, name: Optional[str] = None) -> "RAGSystem":
+        """Get the RAG system of a knowledge base, opening it if needed"""
+        name = validate_name(name)
+        with self._lock:
+            rag_system = self._lookup(name)
+        return rag_system if rag_system is not None else self._open_new(name)
+
+    def _open_new(self, name: str, reset: bool = False) -> "RAGSystem":
+        """Create the RAG system of a knowledge base unless another request just did"""
+        with self._lock:
+            opening = self._opening.setdefault(name, threading.Lock())
+        # Opening may rebuild the keyword index; only requests for the
+        # same knowledge base wait for it, the others keep going
+        with opening:
+            with self._lock:
+                rag_system = self._lookup(name)
+            if rag_system is not None:
+                return rag_system
+            self._ensure_shared()
+            from rag_service import RAGSystem
+            rag_system = RAGSystem(name, self.client, self.embedding_stack, self.llm, self.executor, reset=reset)
+            with self._lock:
+                self._open[name] = rag_system
+                self._opening.pop(name, None)
+                # Shared components are loaded once any knowledge base has opened
+                self.ready = True
+                self._evict()
+            return rag_system
+
+    def clear(self, name: Optional[str] = None) -> bool:
+        """Clear a knowledge base, resetting it unopened if it was built with different embeddings"""
+        from database import EmbeddingMismatchError
+        name = validate_name(name)
+        with self._lock:
+            self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            try:
+                rag_system = self.get(name)
+            except EmbeddingMismatchError as e:
+                print(f"Resetting knowledge base {name}: {e}")
+                self._open_new(name, reset=True)
+                return True
+            return rag_system.clear_knowledge_base()
+        finally:
+            self.release(name)
+
+    def _lookup(self, name: str) -> Optional["RAGSystem"]:
+        """Get an open knowledge base and mark it most recently used; call with the lock held"""
+        rag_system = self._open.get(name)
+        if rag_system is not None:
+            self._open.move_to_end(name)
+        return rag_system
+
+    def _evict(self):
+        """Close least recently used, unpinned knowledge bases beyond max_open"""
+        for name in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            if not self._pins.get(name):
+                del self._open[name]
+                print(f"Closed knowledge base: {name}")
+
+    def pin(self, name: Optional[str] = None) -> "RAGSystem":
+        """Open a knowledge base and keep it open until release() is called"""
+        name = validate_name(name)
+        with self._lock:
+            self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            return self.get(name)
+        except Exception:
+            self.release(name)
+            raise
+
+    def release(self, name: Optional[str] = None):
+        """Undo one pin() call"""
+        name = validate_name(name)
+        with self._lock:
+            remaining = self._pins.get(name, 0) - 1
+            if remaining > 0:
+                self._pins[name] = remaining
+            else:
+                self._pins.pop(name, None)
+            self._evict()
+
+    def list(self) -> List[Dict]:
+        """List stored knowledge bases and whether each is currently open"""
+        self._ensure_shared()
+        with self._lock:
+            open_names = set(self._open)
+        names = sorted(collection.name for collection in self.client.list_collections())
+        return [{"name": name, "open": name in open_names} for name in names]
@@ -1,18 +1,58 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import List, Optional
-import uvicorn
-from rag_service import RAGSystem
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from python_multipart.multipart import MultipartParser, parse_options_header
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple
+from knowledge_bases import KnowledgeBaseRegistry, validate_name
+from metadata_filter import MetadataValue, build_where
+from jobs import IngestionJobManager
+from metrics import render_metrics
 import config
+import asyncio
+import hashlib
+import json
 import os
+import tempfile
+
+if TYPE_CHECKING:
+    from rag_service import RAGSystem
+
+# Outcome of the background warm-up, reported by /ready
+startup_state = {"warm_up_error": None}
+
+
+async def warm_up():
+    """Open the default knowledge base (and import Chroma/LangChain) off the event loop"""
+    try:
+        rag_system = await run_in_threadpool(knowledge_bases.warm_up)
+        kb_info = await run_in_threadpool(rag_system.get_knowledge_base_info)
+        if kb_info.get("count", 0) > 0:
+            print(f"Knowledge Base: {kb_info['count']} document chunks loaded")
+        else:
+            print("Knowledge Base: Empty - Upload a PDF to get started")
+    except Exception as e:
+        startup_state["warm_up_error"] = str(e)
+        print(f"Warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Accept connections immediately; heavy components load in the background
+    warm_up_task = asyncio.create_task(warm_up()) if config.WARM_UP_ON_STARTUP else None
+    yield
+    if warm_up_task:
+        warm_up_task.cancel()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Simple RAG API with PDF",
     description="A simple RAG API using ChromaDB, Google Gemini, and PDF as knowledge base",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -24,14 +64,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize RAG system
-rag_system = RAGSystem()
+# Knowledge bases (and the Chroma/LangChain clients behind them) are opened on first use
+# and kept in a bounded LRU
+knowledge_bases = KnowledgeBaseRegistry(max_open=config.MAX_OPEN_KNOWLEDGE_BASES)
+
+# Background ingestion workers keep PDF processing off the event loop
+job_manager = IngestionJobManager(
+    max_workers=config.INGESTION_WORKERS,
+    max_finished_jobs=config.INGESTION_MAX_FINISHED_JOBS
+)
 
 
 # Pydantic models
+class ChatFilters(BaseModel):
+    filenames: Optional[List[str]] = None
+    page_min: Optional[int] = None
+    page_max: Optional[int] = None
+    metadata: Optional[Dict[str, MetadataValue]] = None
+
+
 class ChatRequest(BaseModel):
     query: str
-    k: Optional[int] = 3
+    k: Optional[int] = Field(3, ge=1, le=config.MAX_K)
+    search_mode: Optional[Literal["vector", "keyword", "hybrid"]] = "vector"
+    use_mmr: Optional[bool] = False
+    fetch_k: Optional[int] = Field(None, ge=1, le=config.MAX_FETCH_K)
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    include_timings: Optional[bool] = False
+    knowledge_base: Optional[str] = None
+    filters: Optional[ChatFilters] = None
 
 
 class ChatResponse(BaseModel):
@@ -40,47 +101,291 @@ class ChatResponse(BaseModel):
     context_used: int
     context: List[str]
     sources: Optional[List[dict]] = []
+    cached: Optional[bool] = False
+    context_tokens: Optional[int] = 0
+    context_tokens_dropped: Optional[int] = 0
+    timings: Optional[Dict[str, float]] = None
+
+
+class BatchChatRequest(BaseModel):
+    queries: List[str]
+    k: Optional[int] = Field(3, ge=1, le=config.MAX_K)
+    search_mode: Optional[Literal["vector", "keyword", "hybrid"]] = "vector"
+    use_mmr: Optional[bool] = False
+    fetch_k: Optional[int] = Field(None, ge=1, le=config.MAX_FETCH_K)
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    knowledge_base: Optional[str] = None
+    filters: Optional[ChatFilters] = None
+
+
+class BatchChatItem(BaseModel):
+    index: int
+    success: bool
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItem]
 
 
 class UploadResponse(BaseModel):
     success: bool
     message: str
     filename: str
+    document_id: Optional[str] = None
     pages_processed: int
     chunks_created: Optional[int] = 0
+    timings: Optional[Dict[str, float]] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    filename: str
+    knowledge_base: Optional[str] = None
+    status: str
+    pages_total: Optional[int] = None
+    pages_processed: int = 0
+    chunks_processed: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def selected_knowledge_base(
+    knowledge_base: Optional[str] = Query(None, description="Knowledge base to use"),
+    x_knowledge_base: Optional[str] = Header(None, alias=config.KNOWLEDGE_BASE_HEADER)
+) -> str:
+    """Knowledge base named by query parameter or header, defaulting to COLLECTION_NAME"""
+    try:
+        return validate_name(knowledge_base or x_knowledge_base)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def open_knowledge_base(name: str, override: Optional[str] = None) -> "RAGSystem":
+    """Open a knowledge base off the event loop; a name from the request body overrides the header"""
+    try:
+        name = validate_name(override or name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await run_in_threadpool(knowledge_bases.get, name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error opening knowledge base {name}: {str(e)}")
+
+
+@asynccontextmanager
+async def pinned_knowledge_base(name: str):
+    """Open a knowledge base and keep it from being evicted while a write runs on it"""
+    try:
+        rag_system = await run_in_threadpool(knowledge_bases.pin, name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error opening knowledge base {name}: {str(e)}")
+    try:
+        yield rag_system
+    finally:
+        knowledge_bases.release(name)
+
+
+async def receive_upload(request: Request, field: str = "file") -> Tuple[str, str, str]:
+    """Stream a multipart file field straight into a named temp file, hashing and size-checking it on the way
+
+    The body is read once and not spooled by Starlette first; returns the temp path, the
+    uploaded filename and the SHA-256 of the content. The caller removes the file.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    target = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    hasher = hashlib.sha256()
+    part = {"header_field": b"", "header_value": b"", "disposition": b"", "writing": False}
+    upload = {"filename": None, "size": 0}
+
+    def on_part_begin():
+        part.update(header_field=b"", header_value=b"", disposition=b"", writing=False)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["header_field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["header_value"] += data[start:end]
+
+    def on_header_end():
+        if part["header_field"].lower() == b"content-disposition":
+            part["disposition"] = part["header_value"]
+        part["header_field"], part["header_value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["disposition"])
+        if options.get(b"name") == field.encode() and b"filename" in options and upload["filename"] is None:
+            upload["filename"] = options[b"filename"].decode("utf-8", "replace")
+            part["writing"] = True
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if not part["writing"]:
+            return
+        upload["size"] += end - start
+        if upload["size"] > config.MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"File too large (limit is {config.MAX_UPLOAD_BYTES} bytes)")
+        hasher.update(data[start:end])
+        target.write(data[start:end])
+
+    def on_part_end():
+        part["writing"] = False
+
+    parser = MultipartParser(params[b"boundary"], callbacks={
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end
+    })
+    try:
+        with target:
+            async for chunk in request.stream():
+                # Disk writes happen in the callbacks, so feed the parser off the event loop
+                await run_in_threadpool(parser.write, chunk)
+            parser.finalize()
+        if upload["filename"] is None:
+            raise HTTPException(status_code=400, detail=f"No file in the '{field}' field")
+        return target.name, upload["filename"], hasher.hexdigest()
+    except BaseException:
+        os.remove(target.name)
+        raise
+
+
+def where_clause(filters: Optional[ChatFilters]) -> Optional[Dict[str, Any]]:
+    """Chroma where clause for the request filters, applied inside the vector query"""
+    if filters is None:
+        return None
+    try:
+        return build_where(filters.filenames, filters.page_min, filters.page_max, filters.metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # API Routes
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, knowledge_base: str = Depends(selected_knowledge_base)):
     """Chat with the RAG system using PDF knowledge base"""
+    rag_system = await open_knowledge_base(knowledge_base, request.knowledge_base)
+    where = where_clause(request.filters)
     try:
-        result = rag_system.chat_with_sources(request.query, request.k)
+        result = await rag_system.achat_with_sources(
+            request.query, request.k, request.search_mode, request.use_mmr, request.fetch_k, request.mmr_lambda,
+            request.include_timings, where
+        )
         return ChatResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
 
-@app.post("/upload-pdf", response_model=UploadResponse)
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload a PDF file to create/update the knowledge base"""
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Answer several questions at once; results and errors are returned in request order"""
+    rag_system = await open_knowledge_base(knowledge_base, request.knowledge_base)
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries provided")
+    if len(request.queries) > config.BATCH_CHAT_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries (limit is {config.BATCH_CHAT_MAX_QUERIES})"
+        )
+    where = where_clause(request.filters)
     try:
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-
-        # Read file content
-        content = await file.read()
-        if len(content) == 0:
-            raise HTTPException(status_code=400, detail="Empty file uploaded")
-
-        # Process PDF using RAG system
-        result = rag_system.load_pdf_from_bytes(content, file.filename)
-
-        if result["success"]:
-            return UploadResponse(**result)
-        else:
-            raise HTTPException(status_code=400, detail=result["message"])
+        max_concurrency = min(
+            request.max_concurrency or config.BATCH_CHAT_CONCURRENCY, config.BATCH_CHAT_CONCURRENCY
+        )
+        items = await rag_system.achat_batch(
+            request.queries, request.k, request.search_mode, request.use_mmr,
+            request.fetch_k, request.mmr_lambda, max_concurrency, where
+        )
+        return BatchChatResponse(results=[BatchChatItem(index=i, **item) for i, item in enumerate(items)])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch chat: {str(e)}")
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request,
+                      knowledge_base: str = Depends(selected_knowledge_base)):
+    """Stream the answer as server-sent events: sources first, then tokens"""
+    rag_system = await open_knowledge_base(knowledge_base, request.knowledge_base)
+    where = where_clause(request.filters)
+
+    async def event_stream():
+        events = rag_system.astream_chat(
+            request.query, request.k, request.search_mode, request.use_mmr, request.fetch_k, request.mmr_lambda,
+            request.include_timings, where
+        )
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            # Stops LLM generation when the client goes away
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}
+}
+
+
+@app.post("/upload-pdf", response_model=JobResponse, status_code=202,
+          openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_pdf(request: Request, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Upload a PDF file and queue it for ingestion into the knowledge base"""
+    rag_system = await open_knowledge_base(knowledge_base)
+    try:
+        # One pass over the body: the same temp file is hashed here and parsed by the job,
+        # in-process or by the extraction pool depending on its page count
+        path, filename, file_hash = await receive_upload(request)
+        try:
+            if not filename.lower().endswith('.pdf'):
+                raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+            if os.path.getsize(path) == 0:
+                raise HTTPException(status_code=400, detail="Empty file uploaded")
+
+            # Reject files whose exact content is already in the knowledge base
+            if await run_in_threadpool(rag_system.is_file_ingested, file_hash):
+                raise HTTPException(status_code=409, detail=f"{filename} is already in the knowledge base")
+
+            rag_system = await run_in_threadpool(knowledge_bases.pin, knowledge_base)
+        except BaseException:
+            os.remove(path)
+            raise
+
+        def finish_upload():
+            os.remove(path)
+            knowledge_bases.release(knowledge_base)
+
+        # Process PDF in the background; the job removes the temp file when done and
+        # keeps the knowledge base open until it finishes
+        job = job_manager.submit(
+            rag_system.load_pdf_from_file, filename, path, filename, file_hash,
+            knowledge_base=knowledge_base,
+            on_finish=finish_upload
+        )
+        return JobResponse(**job)
 
     except HTTPException:
         raise
@@ -88,8 +393,23 @@ async def upload_pdf(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
 
+@app.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(knowledge_base: str = Depends(selected_knowledge_base)):
+    """List ingestion jobs of the knowledge base, newest first"""
+    return [JobResponse(**job) for job in job_manager.list(knowledge_base)]
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Get status, progress and errors of an ingestion job"""
+    job = job_manager.get(job_id)
+    if not job or job["knowledge_base"] != knowledge_base:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return JobResponse(**job)
+
+
 @app.post("/upload-pdf-from-path", response_model=UploadResponse)
-async def upload_pdf_from_path(pdf_path: str):
+async def upload_pdf_from_path(pdf_path: str, knowledge_base: str = Depends(selected_knowledge_base)):
     """Upload a PDF file from local path (for development/testing)"""
     try:
         # Validate path
@@ -99,7 +419,8 @@ async def upload_pdf_from_path(pdf_path: str):
         if not pdf_path.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-        result = rag_system.load_pdf_from_file(pdf_path)
+        async with pinned_knowledge_base(knowledge_base) as rag_system:
+            result = await run_in_threadpool(rag_system.load_pdf_from_file, pdf_path)
 
         if result["success"]:
             return UploadResponse(**result)
@@ -112,9 +433,32 @@ async def upload_pdf_from_path(pdf_path: str):
         raise HTTPException(status_code=500, detail=f"Error loading PDF from path: {str(e)}")
 
 
+@app.post("/ingest/bulk", response_model=JobResponse, status_code=202)
+async def ingest_bulk(path: str, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Queue ingestion of every PDF in a local directory, glob pattern or zip archive"""
+    # Imported here so pypdf is not loaded at startup
+    from bulk_ingest import resolve_sources
+    try:
+        sources = await run_in_threadpool(resolve_sources, path, config.BULK_MAX_FILES)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await open_knowledge_base(knowledge_base)
+    rag_system = await run_in_threadpool(knowledge_bases.pin, knowledge_base)
+    job = job_manager.submit(
+        rag_system.ingest_bulk, path, sources,
+        knowledge_base=knowledge_base,
+        on_finish=lambda: knowledge_bases.release(knowledge_base)
+    )
+    return JobResponse(**job)
+
+
 @app.get("/")
-async def root():
+async def root(knowledge_base: str = Depends(selected_knowledge_base)):
     """API root endpoint with basic information"""
+    rag_system = await open_knowledge_base(knowledge_base)
     kb_info = rag_system.get_knowledge_base_info()
     return {
         "message": "Simple RAG API with PDF - Enhanced with PyPDFLoader",
@@ -122,17 +466,31 @@ async def root():
         "model": config.GEMINI_MODEL,
         "knowledge_base": {
             "type": "PDF Documents",
+            "name": knowledge_base,
             "documents_count": kb_info.get("count", 0)
         },
         "endpoints": [
             "POST /chat - Chat with the RAG system",
-            "POST /upload-pdf - Upload a PDF to knowledge base",
+            "POST /chat/batch - Answer several questions in one request",
+            "POST /chat/stream - Chat with streamed sources and tokens (server-sent events)",
+            "POST /upload-pdf - Upload a PDF to knowledge base (returns a job ID)",
+            "GET /jobs - List ingestion jobs",
+            "GET /jobs/{job_id} - Get ingestion job status and progress",
             "POST /upload-pdf-from-path - Load PDF from local path",
+            "POST /ingest/bulk - Ingest every PDF in a directory, glob or zip archive as a background job",
+            "GET /knowledge-bases - List knowledge bases",
             "GET /knowledge-base/info - Get knowledge base information",
-            "GET /knowledge-base/summary - Get document summary",
+            "GET /knowledge-base/summary - Get precomputed corpus and document summaries",
+            "POST /knowledge-base/summary/refresh - Rebuild missing or outdated summaries in the background",
+            "GET /documents - List documents with their document IDs",
+            "DELETE /documents?filename=... - Delete one file from the knowledge base",
+            "DELETE /documents/{document_id} - Delete one document by ID",
             "DELETE /knowledge-base/clear - Clear knowledge base",
+            "GET /cache/stats - Answer cache hit/miss statistics",
+            "GET /metrics - Per-stage latency histograms (Prometheus format)",
             "GET /ui - Chat UI interface",
-            "GET /health - Health check"
+            "GET /health - Liveness check",
+            "GET /ready - Readiness check (503 until the knowledge base is loaded)"
         ]
     }
 
@@ -147,10 +505,10 @@ async def chat_ui():
 
 
 @app.delete("/knowledge-base/clear")
-async def clear_knowledge_base():
-    """Clear the knowledge base"""
+async def clear_knowledge_base(knowledge_base: str = Depends(selected_knowledge_base)):
+    """Clear the knowledge base, including one built with a different embedding model"""
     try:
-        success = rag_system.clear_knowledge_base()
+        success = await run_in_threadpool(knowledge_bases.clear, knowledge_base)
         if success:
             return {"success": True, "message": "Knowledge base cleared successfully"}
         else:
@@ -159,26 +517,100 @@ async def clear_knowledge_base():
         raise HTTPException(status_code=500, detail=f"Error clearing knowledge base: {str(e)}")
 
 
+@app.get("/documents")
+async def list_documents(knowledge_base: str = Depends(selected_knowledge_base)):
+    """List documents in the knowledge base with their document IDs and chunk counts"""
+    rag_system = await open_knowledge_base(knowledge_base)
+    try:
+        documents = await run_in_threadpool(rag_system.list_documents)
+        return {"success": True, "documents": documents}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing documents: {str(e)}")
+
+
+@app.delete("/documents")
+async def delete_document_by_filename(filename: str, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Delete every chunk of a file, leaving the rest of the knowledge base untouched"""
+    async with pinned_knowledge_base(knowledge_base) as rag_system:
+        try:
+            result = await run_in_threadpool(rag_system.delete_document, filename=filename)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+
+@app.delete("/documents/{document_id}")
+async def delete_document_by_id(document_id: str, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Delete every chunk of a document by its document ID"""
+    async with pinned_knowledge_base(knowledge_base) as rag_system:
+        try:
+            result = await run_in_threadpool(rag_system.delete_document, document_id=document_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+
+@app.get("/knowledge-bases")
+async def list_knowledge_bases():
+    """List stored knowledge bases and which of them are open"""
+    try:
+        return {"success": True, "knowledge_bases": await run_in_threadpool(knowledge_bases.list)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing knowledge bases: {str(e)}")
+
+
 @app.get("/knowledge-base/info")
-async def get_knowledge_base_info():
+async def get_knowledge_base_info(knowledge_base: str = Depends(selected_knowledge_base)):
     """Get information about the PDF knowledge base"""
+    rag_system = await open_knowledge_base(knowledge_base)
     try:
-        info = rag_system.get_knowledge_base_info()
+        info = await run_in_threadpool(rag_system.get_knowledge_base_info)
         return {"success": True, "info": info}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting knowledge base info: {str(e)}")
 
 
 @app.get("/knowledge-base/summary")
-async def get_document_summary():
-    """Get summary of loaded documents"""
+async def get_document_summary(knowledge_base: str = Depends(selected_knowledge_base)):
+    """Get the precomputed corpus summary and per-document summaries"""
+    rag_system = await open_knowledge_base(knowledge_base)
     try:
-        summary = rag_system.get_document_summary()
-        return {"success": True, "summary": summary}
+        summaries = await run_in_threadpool(rag_system.get_summaries)
+        return {"success": True, **summaries}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting document summary: {str(e)}")
 
 
+@app.post("/knowledge-base/summary/refresh", response_model=JobResponse, status_code=202)
+async def refresh_summaries(force: bool = False, knowledge_base: str = Depends(selected_knowledge_base)):
+    """Queue a job that summarizes documents without an up-to-date summary (all of them with force)"""
+    await open_knowledge_base(knowledge_base)
+    rag_system = await run_in_threadpool(knowledge_bases.pin, knowledge_base)
+    job = job_manager.submit(
+        rag_system.refresh_summaries, "summaries", force,
+        knowledge_base=knowledge_base,
+        on_finish=lambda: knowledge_bases.release(knowledge_base)
+    )
+    return JobResponse(**job)
+
+
+@app.get("/cache/stats")
+async def get_cache_stats(knowledge_base: str = Depends(selected_knowledge_base)):
+    """Get answer cache hit/miss statistics"""
+    rag_system = await open_knowledge_base(knowledge_base)
+    return {"success": True, "answer_cache": rag_system.get_answer_cache_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage chat and ingestion latency histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     return {
@@ -189,26 +621,41 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Report whether Chroma and the model clients are loaded, so requests skip the cold-start delay"""
+    if knowledge_bases.ready:
+        return {"status": "ready"}
+    if startup_state["warm_up_error"]:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": startup_state["warm_up_error"]})
+    return JSONResponse(status_code=503, content={"status": "starting"})
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     print(f"Server URL: http://{config.SERVER_HOST}:{config.SERVER_PORT}")
     print(f"API Documentation: http://{config.SERVER_HOST}:{config.SERVER_PORT}/docs")
     print(f"Chat UI: http://{config.SERVER_HOST}:{config.SERVER_PORT}/ui")
     print(f"AI Model: {config.GEMINI_MODEL}")
     print(f"Document Loader: PyPDFLoader (langchain_community)")
     print(f"Vector Store: ChromaDB")
-    
-    # Check if knowledge base has any documents
-    kb_info = rag_system.get_knowledge_base_info()
-    if kb_info.get("count", 0) > 0:
-        print(f"Knowledge Base: {kb_info['count']} document chunks loaded")
-    else:
-        print("Knowledge Base: Empty - Upload a PDF to get started")
-    
+    print(f"Mode: {'development (auto-reload)' if config.SERVER_RELOAD else 'production'}")
     print("\n" + "="*50 + "\n")
 
-    uvicorn.run(
-        "main:app",
-        host=config.SERVER_HOST,
-        port=config.SERVER_PORT,
-        reload=True
-    )
\ No newline at end of file
+    if config.SERVER_RELOAD:
+        # The reloader re-imports the app in a subprocess, so it is given an import string
+        uvicorn.run(
+            "main:app",
+            host=config.SERVER_HOST,
+            port=config.SERVER_PORT,
+            log_level=config.SERVER_LOG_LEVEL,
+            reload=True
+        )
+    else:
+        uvicorn.run(
+            app,
+            host=config.SERVER_HOST,
+            port=config.SERVER_PORT,
+            log_level=config.SERVER_LOG_LEVEL
+        )
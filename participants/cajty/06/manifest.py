@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IngestionManifest:
+    """Persistent record of which pages and chunks of each source file reached the vector store
+
+    A file is "partial" while it is being ingested and "complete" once every page is stored.
+    Pages are committed in order after their chunks are written, so after a crash ingestion
+    can resume from the last committed page instead of starting over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS manifest_files (
+                knowledge_base TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                document_id TEXT,
+                file_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                pages_total INTEGER,
+                pages_committed INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (knowledge_base, filename)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS manifest_chunks (
+                knowledge_base TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                committed_page INTEGER NOT NULL,
+                PRIMARY KEY (knowledge_base, filename, chunk_id)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS manifest_files_hash ON manifest_files (knowledge_base, file_hash)"
+        )
+        self._conn.commit()
+
+    def get(self, knowledge_base: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry of one file"""
+        files = self.list_files(knowledge_base, filename)
+        return files[0] if files else None
+
+    def list_files(self, knowledge_base: str, filename: str = None) -> List[Dict[str, Any]]:
+        """List manifest entries of a knowledge base, by filename"""
+        query = (
+            "SELECT f.filename, f.document_id, f.file_hash, f.status, f.pages_total, f.pages_committed, "
+            "f.updated_at, (SELECT COUNT(*) FROM manifest_chunks c "
+            "WHERE c.knowledge_base = f.knowledge_base AND c.filename = f.filename) "
+            "FROM manifest_files f WHERE f.knowledge_base = ?"
+        )
+        params = [knowledge_base]
+        if filename is not None:
+            query += " AND f.filename = ?"
+            params.append(filename)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY f.filename", params).fetchall()
+        keys = ("filename", "document_id", "file_hash", "status", "pages_total", "pages_committed",
+                "updated_at", "chunks")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def has_complete(self, knowledge_base: str, file_hash: str) -> Optional[bool]:
+        """Whether a file with this content hash is fully ingested; None when the manifest has no record of it"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status FROM manifest_files WHERE knowledge_base = ? AND file_hash = ?",
+                (knowledge_base, file_hash)
+            ).fetchall()
+        if not rows:
+            return None
+        return any(status == "complete" for status, in rows)
+
+    def start(self, knowledge_base: str, filename: str, document_id: str, file_hash: str) -> Tuple[int, List[str]]:
+        """Begin or resume ingesting a file; returns the pages already committed and their chunk IDs
+
+        Earlier progress only counts when it belongs to the same content; otherwise the file starts over.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_hash, status, pages_committed FROM manifest_files "
+                "WHERE knowledge_base = ? AND filename = ?",
+                (knowledge_base, filename)
+            ).fetchone()
+            if row and row[0] == file_hash and row[1] == "partial":
+                chunk_ids = [chunk_id for chunk_id, in self._conn.execute(
+                    "SELECT chunk_id FROM manifest_chunks WHERE knowledge_base = ? AND filename = ? "
+                    "ORDER BY rowid",
+                    (knowledge_base, filename)
+                )]
+                return row[2], chunk_ids
+
+            self._conn.execute(
+                "DELETE FROM manifest_chunks WHERE knowledge_base = ? AND filename = ?",
+                (knowledge_base, filename)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest_files "
+                "(knowledge_base, filename, document_id, file_hash, status, pages_total, pages_committed, updated_at) "
+                "VALUES (?, ?, ?, ?, 'partial', NULL, 0, ?)",
+                (knowledge_base, filename, document_id, file_hash, time.time())
+            )
+            self._conn.commit()
+            return 0, []
+
+    def commit_pages(self, knowledge_base: str, filename: str, last_page: int, chunk_ids: List[str]):
+        """Record that every page up to last_page is stored, with the chunk IDs written for them"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO manifest_chunks (knowledge_base, filename, chunk_id, committed_page) "
+                "VALUES (?, ?, ?, ?)",
+                [(knowledge_base, filename, chunk_id, last_page) for chunk_id in chunk_ids]
+            )
+            self._conn.execute(
+                "UPDATE manifest_files SET pages_committed = MAX(pages_committed, ?), updated_at = ? "
+                "WHERE knowledge_base = ? AND filename = ?",
+                (last_page, time.time(), knowledge_base, filename)
+            )
+            self._conn.commit()
+
+    def complete(self, knowledge_base: str, filename: str, pages_total: int):
+        """Mark a file as fully ingested"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE manifest_files SET status = 'complete', pages_total = ?, "
+                "pages_committed = MAX(pages_committed, ?), updated_at = ? "
+                "WHERE knowledge_base = ? AND filename = ?",
+                (pages_total, pages_total, time.time(), knowledge_base, filename)
+            )
+            self._conn.commit()
+
+    def delete(self, knowledge_base: str, filename: str = None, document_id: str = None):
+        """Forget one file, identified by filename or document ID"""
+        column, value = ("filename", filename) if filename is not None else ("document_id", document_id)
+        with self._lock:
+            filenames = [name for name, in self._conn.execute(
+                f"SELECT filename FROM manifest_files WHERE knowledge_base = ? AND {column} = ?",
+                (knowledge_base, value)
+            )]
+            for name in filenames:
+                self._conn.execute(
+                    "DELETE FROM manifest_chunks WHERE knowledge_base = ? AND filename = ?", (knowledge_base, name)
+                )
+                self._conn.execute(
+                    "DELETE FROM manifest_files WHERE knowledge_base = ? AND filename = ?", (knowledge_base, name)
+                )
+            self._conn.commit()
+
+    def clear(self, knowledge_base: str):
+        """Forget every file of a knowledge base"""
+        with self._lock:
+            self._conn.execute("DELETE FROM manifest_chunks WHERE knowledge_base = ?", (knowledge_base,))
+            self._conn.execute("DELETE FROM manifest_files WHERE knowledge_base = ?", (knowledge_base,))
+            self._conn.commit()
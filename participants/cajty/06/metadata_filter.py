@@ -0,0 +1,33 @@
+from typing import Any, Dict, List, Optional, Union
+
+MetadataValue = Union[str, int, float, bool]
+
+
+def build_where(filenames: Optional[List[str]] = None, page_min: Optional[int] = None,
+                page_max: Optional[int] = None,
+                metadata: Optional[Dict[str, MetadataValue]] = None) -> Optional[Dict[str, Any]]:
+    """Build a Chroma where clause from chat filters; None when nothing is filtered
+
+    Raises ValueError for filters that cannot match anything or are not valid metadata keys.
+    """
+    conditions = []
+    if filenames is not None:
+        if not filenames:
+            raise ValueError("filenames must not be empty")
+        conditions.append({"filename": {"$in": sorted(set(filenames))}})
+    if page_min is not None and page_max is not None and page_min > page_max:
+        raise ValueError(f"page_min ({page_min}) is greater than page_max ({page_max})")
+    if page_min is not None:
+        conditions.append({"page": {"$gte": page_min}})
+    if page_max is not None:
+        conditions.append({"page": {"$lte": page_max}})
+    for key, value in sorted((metadata or {}).items()):
+        if not key or key.startswith("$"):
+            raise ValueError(f"Invalid metadata key: {key!r}")
+        conditions.append({key: {"$eq": value}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
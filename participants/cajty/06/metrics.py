@@ -0,0 +1,154 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Upper bounds in seconds, from sub-millisecond cache lookups to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY = []
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one series per label value"""
+
+    def __init__(self, name: str, documentation: str, label: str = "stage", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, label_value: str, value: float):
+        """Record one observation for a label value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            series["counts"][index] += 1
+            series["sum"] += value
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: (list(series["counts"]), series["sum"]) for key, series in self._series.items()}
+        for label_value, (counts, total) in sorted(snapshot.items()):
+            label = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total!r}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus-style counter with one series per label value"""
+
+    def __init__(self, name: str, documentation: str, label: str):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, label_value: str, amount: float = 1):
+        """Increase the counter for a label value"""
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_value, value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value!r}')
+        return lines
+
+
+CHAT_STAGE_SECONDS = Histogram(
+    "rag_chat_stage_seconds",
+    "Time spent in each stage of answering a question"
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "rag_ingest_stage_seconds",
+    "Time spent in each stage of ingesting one document"
+)
+CHAT_REQUESTS = Counter(
+    "rag_chat_requests_total",
+    "Answered questions by outcome",
+    label="outcome"
+)
+
+
+class StageTimer:
+    """Accumulates per-stage durations for one request and records them in a histogram"""
+
+    def __init__(self, histogram: Optional[Histogram] = None, total_stage: Optional[str] = "total"):
+        self.histogram = histogram
+        self.total_stage = total_stage
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._total: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block, adding to any earlier time spent in the same stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def timed_iter(self, iterable: Iterable, name: str) -> Iterator:
+        """Yield from an iterable, charging the time spent producing each item to a stage"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def total(self) -> float:
+        """Elapsed seconds since the timer started, frozen once recorded"""
+        return self._total if self._total is not None else time.perf_counter() - self.started
+
+    def milliseconds(self) -> Dict[str, float]:
+        """Stage durations and the total in milliseconds"""
+        timings = {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        timings[self.total_stage or "total"] = round(self.total() * 1000, 3)
+        return timings
+
+    def record(self):
+        """Observe every stage (and the total, unless disabled) in the histogram once"""
+        if self._total is not None:
+            return
+        self._total = time.perf_counter() - self.started
+        if self.histogram is None:
+            return
+        for name, seconds in self.stages.items():
+            self.histogram.observe(name, seconds)
+        if self.total_stage:
+            self.histogram.observe(self.total_stage, self._total)
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+from pypdf import PdfReader
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Get the shared process pool, creating it on first use"""
+    global _executor, _executor_workers
+    # Several ingestion threads may extract large PDFs at the same time
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+        return _executor
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, end) in a worker process"""
+    reader = PdfReader(pdf_path)
+    return [(i + 1, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def count_pages(pdf_path: Union[str, BinaryIO]) -> int:
+    """Get the number of pages in a PDF from a path or file-like object"""
+    return len(PdfReader(pdf_path).pages)
+
+
+def iter_stream_pages(stream: Union[str, BinaryIO], start_page: int = 1) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) one page at a time from a path or file-like object, from start_page on"""
+    reader = PdfReader(stream)
+    for i in range(max(start_page, 1) - 1, len(reader.pages)):
+        yield i + 1, reader.pages[i].extract_text() or ""
+
+
+def iter_pages_parallel(
+    pdf_path: str,
+    workers: int = None,
+    pages_per_task: int = 8,
+    max_inflight_tasks: int = None,
+    start_page: int = 1
+) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) in page order, from start_page on, while page ranges are extracted in a process pool
+
+    At most max_inflight_tasks page ranges are queued at once, so memory is
+    bounded by a window of pages rather than the whole document.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_inflight_tasks = max_inflight_tasks or workers * 2
+    total_pages = count_pages(pdf_path)
+    executor = _get_executor(workers)
+
+    ranges = iter([(start, min(start + pages_per_task, total_pages))
+                   for start in range(max(start_page, 1) - 1, total_pages, pages_per_task)])
+    pending = deque()
+
+    def fill():
+        while len(pending) < max_inflight_tasks:
+            page_range = next(ranges, None)
+            if page_range is None:
+                return
+            pending.append(executor.submit(_extract_page_range, pdf_path, *page_range))
+
+    try:
+        fill()
+        while pending:
+            pages = pending.popleft().result()
+            fill()
+            yield from pages
+    finally:
+        # Drop queued ranges if the consumer stops early
+        for future in pending:
+            future.cancel()
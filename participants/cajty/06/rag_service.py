@@ -1,27 +1,79 @@
-from typing import List, Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List, Dict, Any, Optional, AsyncIterator, BinaryIO, Callable, Iterable, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_community.document_loaders import PyPDFLoader
 import config
 from database import ChromaDBManager
-import tempfile
+from answer_cache import AnswerCache
+from context_packer import pack_context
+from metrics import CHAT_REQUESTS, CHAT_STAGE_SECONDS, INGEST_STAGE_SECONDS, StageTimer
+from pdf_extract import count_pages, hash_file, iter_pages_parallel, iter_stream_pages
+from summaries import SummaryStore, Summarizer
+from manifest import IngestionManifest
+from bulk_ingest import BulkIngestion
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
+import io
 import os
 
+NO_DOCUMENTS_MESSAGE = "No PDF document has been uploaded yet. Please upload a PDF file first to start chatting."
+
+
+def create_llm():
+    """Initialize the Google Gemini chat model"""
+    # The Gemini SDK alone takes over a second to import, so it is loaded on first use
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=config.GEMINI_MODEL,
+        google_api_key=config.GEMINI_API_KEY,
+        temperature=0.7,
+        max_tokens=800,
+        top_p=0.9,
+        top_k=40
+    )
+
+
+def create_executor() -> ThreadPoolExecutor:
+    """Bounded pool for blocking Chroma and embedding calls made from async handlers"""
+    return ThreadPoolExecutor(
+        max_workers=config.CHROMA_THREAD_POOL_SIZE,
+        thread_name_prefix="chroma"
+    )
+
 
 class RAGSystem:
-    def __init__(self):
-        self.db_manager = ChromaDBManager()
-
-        # Initialize Google Gemini LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model=config.GEMINI_MODEL,
-            google_api_key=config.GEMINI_API_KEY,
-            temperature=0.7,
-            max_tokens=800,
-            top_p=0.9,
-            top_k=40
+    def __init__(self, knowledge_base: str = None, client=None, embedding_stack: Tuple = None,
+                 llm=None, executor: ThreadPoolExecutor = None, reset: bool = False):
+        # Each knowledge base is its own collection; client, embeddings, LLM and pool may be shared
+        self.knowledge_base = knowledge_base or config.COLLECTION_NAME
+        # A reset starts the knowledge base empty without opening what is stored, which may not validate
+        self.db_manager = ChromaDBManager(self.knowledge_base, client, embedding_stack, reset=reset)
+        self.llm = llm or create_llm()
+        self.executor = executor or create_executor()
+
+        # Answers are reused until the knowledge base changes
+        self.answer_cache = AnswerCache(
+            max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            max_distance=config.ANSWER_CACHE_MAX_DISTANCE
+        )
+
+        # Document and corpus summaries are built after ingestion and served from storage
+        self.summary_store = SummaryStore(config.SUMMARY_STORE_PATH)
+        self.summarizer = Summarizer(
+            self.llm,
+            map_chars=config.SUMMARY_MAP_CHARS,
+            fan_in=config.SUMMARY_REDUCE_FAN_IN,
+            max_concurrency=config.SUMMARY_MAX_CONCURRENCY
         )
 
+        # Which pages and chunks of each file are stored, for skipping and resuming ingestion
+        self.manifest = IngestionManifest(config.INGEST_MANIFEST_PATH)
+        if reset:
+            self.summary_store.clear(self.knowledge_base)
+            self.manifest.clear(self.knowledge_base)
+
         # Create the prompt template
         self.prompt_template = ChatPromptTemplate.from_template("""
 You are a helpful AI assistant that answers questions based on the provided document context. 
@@ -39,42 +91,62 @@ Please provide a helpful answer based on the context above.
 
     def add_documents(self, texts: List[str], metadatas: List[Dict] = None) -> bool:
         """Add documents to the knowledge base"""
-        return self.db_manager.add_documents(texts, metadatas)
+        result = self.db_manager.add_documents(texts, metadatas)
+        self.answer_cache.invalidate()
+        return result
 
-    def retrieve_context(self, query: str, k: int = 3) -> List[str]:
-        """Retrieve relevant context from the knowledge base"""
-        results = self.db_manager.similarity_search(query, k=k)
+    def retrieve_context(self, query: str, k: int = 3, search_mode: str = "vector", use_mmr: bool = False,
+                         fetch_k: int = None, mmr_lambda: float = None, where: Dict = None) -> List[str]:
+        """Retrieve relevant context from the knowledge base, optionally diversified with MMR"""
+        timer = StageTimer(CHAT_STAGE_SECONDS, total_stage=None)
+        try:
+            results = self._search(query, None, k, search_mode, use_mmr, fetch_k, mmr_lambda, where, timer=timer)
+        finally:
+            timer.record()
         return [doc.page_content for doc in results]
 
-    def generate_response(self, query: str, context: List[str]) -> str:
-        """Generate response using LangChain with retrieved context"""
-        try:
-            # Format context
-            context_str = "\n\n".join([f"Context {i + 1}: {ctx}" for i, ctx in enumerate(context)])
+    def _build_messages(self, query: str, context: List[str]):
+        """Format retrieved context and the question into chat messages"""
+        context_str = "\n\n".join([f"Context {i + 1}: {ctx}" for i, ctx in enumerate(context)])
+        return self.prompt_template.format_messages(
+            context=context_str,
+            question=query
+        )
 
-            # Create messages for the chat model
-            messages = self.prompt_template.format_messages(
-                context=context_str,
-                question=query
-            )
+    def _generate(self, query: str, context: List[str], timer: StageTimer = None) -> str:
+        """Call the LLM with the retrieved context, raising on failure"""
+        timer = timer or StageTimer()
+        # Create messages for the chat model
+        with timer.stage("prompt"):
+            messages = self._build_messages(query, context)
 
-            # Get response from LLM
+        # Get response from LLM
+        with timer.stage("generate"):
             response = self.llm.invoke(messages)
-            return response.content
+        return response.content
+
+    def generate_response(self, query: str, context: List[str]) -> str:
+        """Generate response using LangChain with retrieved context packed to the token budget"""
+        timer = StageTimer(CHAT_STAGE_SECONDS, total_stage=None)
+        try:
+            with timer.stage("pack_context"):
+                packed = pack_context(context)
+            return self._generate(query, packed["context"], timer)
 
         except Exception as e:
             print(f"Error generating response: {e}")
             return f"I'm sorry, I encountered an error while processing your question: {str(e)}"
+        finally:
+            timer.record()
 
     def chat(self, query: str, k: int = 3) -> Dict[str, Any]:
         """Main RAG chat function using LangChain"""
         try:
             # Check if knowledge base has content
-            kb_info = self.get_knowledge_base_info()
-            if not kb_info or kb_info.get("count", 0) == 0:
+            if self.db_manager.is_empty():
                 return {
                     "query": query,
-                    "response": "No PDF document has been uploaded yet. Please upload a PDF file first to start chatting.",
+                    "response": NO_DOCUMENTS_MESSAGE,
                     "context_used": 0,
                     "context": []
                 }
@@ -100,103 +172,527 @@ Please provide a helpful answer based on the context above.
                 "context": []
             }
 
-    def chat_with_sources(self, query: str, k: int = 3) -> Dict[str, Any]:
+    @staticmethod
+    def _empty_result(query: str) -> Dict[str, Any]:
+        """Response returned while the knowledge base has no documents"""
+        return {
+            "query": query,
+            "response": NO_DOCUMENTS_MESSAGE,
+            "context_used": 0,
+            "context": [],
+            "sources": []
+        }
+
+    @staticmethod
+    def _finish(result: Dict[str, Any], outcome: str, timer: StageTimer, include_timings: bool) -> Dict[str, Any]:
+        """Record request metrics and optionally attach the per-stage timing breakdown"""
+        timer.record()
+        CHAT_REQUESTS.inc(outcome)
+        if include_timings:
+            return {**result, "timings": timer.milliseconds()}
+        return result
+
+    def _check_answer_cache(self, query: str, options: Tuple, timer: StageTimer = None):
+        """Look up a cached answer, embedding the query only when the exact tier misses"""
+        timer = timer or StageTimer()
+        with timer.stage("answer_cache"):
+            generation = self.answer_cache.generation
+            cached = self.answer_cache.get_exact(query, options)
+        query_embedding = None
+        if cached is None:
+            with timer.stage("embed_query"):
+                query_embedding = self.db_manager.embed_query(query)
+            with timer.stage("answer_cache"):
+                cached = self.answer_cache.get_similar(query_embedding, options)
+        return cached, query_embedding, generation
+
+    def _search(self, query: str, query_embedding: Optional[List[float]], k: int, search_mode: str = "vector",
+                use_mmr: bool = False, fetch_k: int = None, mmr_lambda: float = None, where: Dict = None,
+                timer: StageTimer = None):
+        """Retrieve relevant documents with metadata using vector, keyword or hybrid search
+
+        where is a Chroma metadata filter applied by the index before scoring.
+        """
+        timer = timer or StageTimer()
+        if search_mode == "keyword":
+            with timer.stage("search"):
+                return self.db_manager.keyword_search(query, k=k, where=where)
+
+        # Reuse the query embedding from the answer cache lookup when available
+        if query_embedding is None:
+            with timer.stage("embed_query"):
+                query_embedding = self.db_manager.embed_query(query)
+        fetch_k = fetch_k or config.MMR_FETCH_K
+        mmr_lambda = config.MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        with timer.stage("search"):
+            if search_mode == "hybrid":
+                return self.db_manager.hybrid_search(
+                    query, query_embedding, k=k, use_mmr=use_mmr, fetch_k=fetch_k, lambda_mult=mmr_lambda,
+                    where=where
+                )
+            if use_mmr:
+                return self.db_manager.mmr_search_by_vector(
+                    query_embedding, k=k, fetch_k=fetch_k, lambda_mult=mmr_lambda, where=where
+                )
+            return self.db_manager.similarity_search_by_vector(query_embedding, k=k, where=where)
+
+    def _build_result(self, query: str, results, packed: Dict[str, Any], response: str) -> Dict[str, Any]:
+        """Assemble the chat response with context, sources and packing stats"""
+        context = packed["context"]
+        return {
+            "query": query,
+            "response": response,
+            "context_used": len(context),
+            "context": context[:2] if context else [],  # Return first 2 contexts for transparency
+            "sources": self._extract_sources(results),
+            "context_tokens": packed["tokens_packed"],
+            "context_tokens_dropped": packed["tokens_dropped"]
+        }
+
+    def chat_with_sources(self, query: str, k: int = 3, search_mode: str = "vector", use_mmr: bool = False,
+                          fetch_k: int = None, mmr_lambda: float = None,
+                          include_timings: bool = False, where: Dict = None) -> Dict[str, Any]:
         """Chat function that returns sources information"""
+        timer = StageTimer(CHAT_STAGE_SECONDS)
         try:
             # Check if knowledge base has content
-            kb_info = self.get_knowledge_base_info()
-            if not kb_info or kb_info.get("count", 0) == 0:
-                return {
-                    "query": query,
-                    "response": "No PDF document has been uploaded yet. Please upload a PDF file first to start chatting.",
-                    "context_used": 0,
-                    "context": [],
-                    "sources": []
-                }
+            with timer.stage("empty_check"):
+                empty = self.db_manager.is_empty()
+            if empty:
+                return self._finish(self._empty_result(query), "empty", timer, include_timings)
+
+            # Serve repeated or near-identical questions from the answer cache
+            options = (k, search_mode, use_mmr, fetch_k, mmr_lambda, where)
+            cached, query_embedding, generation = self._check_answer_cache(query, options, timer)
+            if cached is not None:
+                return self._finish({**cached, "query": query, "cached": True}, "cached", timer, include_timings)
 
-            # Retrieve relevant documents with metadata
-            results = self.db_manager.similarity_search(query, k=k)
-            
-            # Extract context and sources
-            context = [doc.page_content for doc in results]
-            sources = []
-            
-            for doc in results:
-                if hasattr(doc, 'metadata') and doc.metadata:
-                    sources.append({
-                        "source": doc.metadata.get("source", "Unknown"),
-                        "page": doc.metadata.get("page", 0),
-                        "filename": doc.metadata.get("filename", "Unknown")
-                    })
+            results = self._search(query, query_embedding, *options, timer=timer)
 
             # Generate response using LangChain
-            response = self.generate_response(query, context)
+            # Bound prompt size no matter how many chunks were retrieved
+            with timer.stage("pack_context"):
+                packed = pack_context(results)
+            response = self._generate(query, packed["context"], timer)
 
-            return {
+            result = self._build_result(query, results, packed, response)
+            self.answer_cache.put(query, result, options, query_embedding, generation)
+            return self._finish({**result, "cached": False}, "generated", timer, include_timings)
+
+        except Exception as e:
+            return self._finish({
                 "query": query,
-                "response": response,
-                "context_used": len(context),
-                "context": context[:2] if context else [],  # Return first 2 contexts for transparency
-                "sources": sources
-            }
+                "response": f"Error processing query: {str(e)}",
+                "context_used": 0,
+                "context": [],
+                "sources": []
+            }, "error", timer, include_timings)
+
+    async def _run_blocking(self, func: Callable, *args, **kwargs):
+        """Run a blocking (Chroma/embedding) call on the bounded storage thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def aretrieve_context(self, query: str, k: int = 3, search_mode: str = "vector", use_mmr: bool = False,
+                                fetch_k: int = None, mmr_lambda: float = None, where: Dict = None) -> List[str]:
+        """Retrieve relevant context without blocking the event loop"""
+        return await self._run_blocking(
+            self.retrieve_context, query, k, search_mode, use_mmr, fetch_k, mmr_lambda, where
+        )
 
+    async def _agenerate(self, query: str, context: List[str], timer: StageTimer = None) -> str:
+        """Call the LLM asynchronously, raising on failure"""
+        timer = timer or StageTimer()
+        with timer.stage("prompt"):
+            messages = self._build_messages(query, context)
+        with timer.stage("generate"):
+            response = await self.llm.ainvoke(messages)
+        return response.content
+
+    async def agenerate_response(self, query: str, context: List[str]) -> str:
+        """Generate response with the async LLM client"""
+        timer = StageTimer(CHAT_STAGE_SECONDS, total_stage=None)
+        try:
+            with timer.stage("pack_context"):
+                packed = pack_context(context)
+            return await self._agenerate(query, packed["context"], timer)
         except Exception as e:
-            return {
+            print(f"Error generating response: {e}")
+            return f"I'm sorry, I encountered an error while processing your question: {str(e)}"
+        finally:
+            timer.record()
+
+    async def achat_with_sources(self, query: str, k: int = 3, search_mode: str = "vector", use_mmr: bool = False,
+                                 fetch_k: int = None, mmr_lambda: float = None,
+                                 include_timings: bool = False, where: Dict = None) -> Dict[str, Any]:
+        """Async version of chat_with_sources for use in request handlers"""
+        timer = StageTimer(CHAT_STAGE_SECONDS)
+        try:
+            with timer.stage("empty_check"):
+                empty = await self._run_blocking(self.db_manager.is_empty)
+            if empty:
+                return self._finish(self._empty_result(query), "empty", timer, include_timings)
+
+            options = (k, search_mode, use_mmr, fetch_k, mmr_lambda, where)
+            cached, query_embedding, generation = await self._run_blocking(
+                self._check_answer_cache, query, options, timer
+            )
+            if cached is not None:
+                return self._finish({**cached, "query": query, "cached": True}, "cached", timer, include_timings)
+
+            results = await self._run_blocking(self._search, query, query_embedding, *options, timer=timer)
+            with timer.stage("pack_context"):
+                packed = pack_context(results)
+            response = await self._agenerate(query, packed["context"], timer)
+
+            result = self._build_result(query, results, packed, response)
+            self.answer_cache.put(query, result, options, query_embedding, generation)
+            return self._finish({**result, "cached": False}, "generated", timer, include_timings)
+
+        except Exception as e:
+            return self._finish({
                 "query": query,
                 "response": f"Error processing query: {str(e)}",
                 "context_used": 0,
                 "context": [],
                 "sources": []
+            }, "error", timer, include_timings)
+
+    def _prepare_batch(self, queries: List[str], options: Tuple) -> List[Dict[str, Any]]:
+        """Resolve cache hits and retrieve context for a batch with one embedding call and one vector query"""
+        k, search_mode, use_mmr, where = options[0], options[1], options[2], options[5]
+        items = [{"query": query, "generation": self.answer_cache.generation} for query in queries]
+
+        for item in items:
+            item["cached"] = self.answer_cache.get_exact(item["query"], options)
+
+        # Embed every query that missed the exact tier in a single call
+        pending = [item for item in items if item["cached"] is None]
+        if pending:
+            embeddings = self.db_manager.embed_queries([item["query"] for item in pending])
+            for item, embedding in zip(pending, embeddings):
+                item["embedding"] = embedding
+                item["cached"] = self.answer_cache.get_similar(embedding, options)
+
+        pending = [item for item in items if item["cached"] is None]
+        if pending and search_mode == "vector" and not use_mmr:
+            batch_results = self.db_manager.batch_similarity_search_by_vector(
+                [item["embedding"] for item in pending], k=k, where=where
+            )
+            for item, results in zip(pending, batch_results):
+                item["results"] = results
+        else:
+            for item in pending:
+                item["results"] = self._search(item["query"], item["embedding"], *options)
+        return items
+
+    async def achat_batch(self, queries: List[str], k: int = 3, search_mode: str = "vector",
+                          use_mmr: bool = False, fetch_k: int = None, mmr_lambda: float = None,
+                          max_concurrency: int = None, where: Dict = None) -> List[Dict[str, Any]]:
+        """Answer several queries with shared embedding/search and bounded concurrent generation
+
+        Returns one entry per query, in order, with either a result or an error.
+        """
+        if await self._run_blocking(self.db_manager.is_empty):
+            return [{"success": True, "result": self._empty_result(query), "error": None} for query in queries]
+
+        options = (k, search_mode, use_mmr, fetch_k, mmr_lambda, where)
+        items = await self._run_blocking(self._prepare_batch, queries, options)
+        semaphore = asyncio.Semaphore(max_concurrency or config.BATCH_CHAT_CONCURRENCY)
+
+        async def answer(item: Dict[str, Any]) -> Dict[str, Any]:
+            query = item["query"]
+            if item["cached"] is not None:
+                CHAT_REQUESTS.inc("cached")
+                return {"success": True, "result": {**item["cached"], "query": query, "cached": True}, "error": None}
+            try:
+                packed = pack_context(item["results"])
+                async with semaphore:
+                    response = await self._agenerate(query, packed["context"])
+                result = self._build_result(query, item["results"], packed, response)
+                self.answer_cache.put(query, result, options, item.get("embedding"), item["generation"])
+                CHAT_REQUESTS.inc("generated")
+                return {"success": True, "result": {**result, "cached": False}, "error": None}
+            except Exception as e:
+                CHAT_REQUESTS.inc("error")
+                return {"success": False, "result": None, "error": f"Error processing query: {str(e)}"}
+
+        return await asyncio.gather(*(answer(item) for item in items))
+
+    @staticmethod
+    def _extract_sources(results) -> List[Dict[str, Any]]:
+        """Build source information from retrieved documents"""
+        sources = []
+        for doc in results:
+            if hasattr(doc, 'metadata') and doc.metadata:
+                sources.append({
+                    "source": doc.metadata.get("source", "Unknown"),
+                    "page": doc.metadata.get("page", 0),
+                    "filename": doc.metadata.get("filename", "Unknown")
+                })
+        return sources
+
+    async def astream_chat(self, query: str, k: int = 3, search_mode: str = "vector", use_mmr: bool = False,
+                           fetch_k: int = None, mmr_lambda: float = None,
+                           include_timings: bool = False, where: Dict = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat answer as events: sources first, then LLM tokens, then done"""
+        timer = StageTimer(CHAT_STAGE_SECONDS)
+        outcome = "error"
+        try:
+            with timer.stage("empty_check"):
+                empty = await self._run_blocking(self.db_manager.is_empty)
+            if empty:
+                outcome = "empty"
+                yield {"event": "sources", "data": {"sources": [], "context_used": 0}}
+                yield {"event": "token", "data": {"text": NO_DOCUMENTS_MESSAGE}}
+                yield {"event": "done", "data": {}}
+                return
+
+            results = await self._run_blocking(
+                self._search, query, None, k, search_mode, use_mmr, fetch_k, mmr_lambda, where, timer=timer
+            )
+            with timer.stage("pack_context"):
+                packed = pack_context(results)
+            yield {
+                "event": "sources",
+                "data": {
+                    "sources": self._extract_sources(results),
+                    "context_used": packed["chunks_packed"],
+                    "context_tokens": packed["tokens_packed"],
+                    "context_tokens_dropped": packed["tokens_dropped"]
+                }
             }
 
+            with timer.stage("prompt"):
+                messages = self._build_messages(query, packed["context"])
+
+            # Closing this generator (e.g. on client disconnect) closes the LLM stream too
+            with timer.stage("generate"):
+                async for chunk in self.llm.astream(messages):
+                    if chunk.content:
+                        yield {"event": "token", "data": {"text": chunk.content}}
+
+            outcome = "generated"
+            timer.record()
+            yield {"event": "done", "data": {"timings": timer.milliseconds()} if include_timings else {}}
+
+        except Exception as e:
+            print(f"Error streaming response: {e}")
+            yield {"event": "error", "data": {"message": f"Error processing query: {str(e)}"}}
+        finally:
+            timer.record()
+            CHAT_REQUESTS.inc(outcome)
+
     def get_knowledge_base_info(self) -> Dict[str, Any]:
         """Get information about the knowledge base"""
         return self.db_manager.get_collection_info()
 
+    def get_answer_cache_stats(self) -> Dict[str, Any]:
+        """Get answer cache hit/miss statistics"""
+        return self.answer_cache.get_stats()
+
     def clear_knowledge_base(self) -> bool:
-        """Clear the knowledge base"""
+        """Clear the knowledge base, keeping the embeddings client, splitter and indexes alive"""
         result = self.db_manager.delete_collection()
-        if result:
-            # Reinitialize the database manager to ensure clean state
-            from database import ChromaDBManager
-            self.db_manager = ChromaDBManager()
+        self.answer_cache.invalidate()
+        self.summary_store.clear(self.knowledge_base)
+        self.manifest.clear(self.knowledge_base)
         return result
 
-    def load_pdf_from_file(self, pdf_path: str) -> Dict[str, Any]:
-        """Load PDF from file path"""
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """List documents in the knowledge base"""
+        return self.db_manager.list_documents()
+
+    def delete_document(self, filename: str = None, document_id: str = None) -> Dict[str, Any]:
+        """Delete every chunk of one document, identified by filename or document ID"""
+        if filename:
+            deleted = self.db_manager.delete_by_filename(filename)
+            label = filename
+            document_id = self.db_manager.document_id_for(filename)
+        else:
+            deleted = self.db_manager.delete_by_document_id(document_id)
+            label = document_id
+        self.manifest.delete(self.knowledge_base, document_id=document_id)
+        if deleted:
+            self.answer_cache.invalidate()
+            self.summary_store.delete_document(self.knowledge_base, document_id)
+            self._refresh_corpus_summary_safely()
+        return {
+            "success": bool(deleted),
+            "message": f"Deleted {deleted} chunks of {label}" if deleted else f"Document not found: {label}",
+            "chunks_deleted": deleted
+        }
+
+    def resume_point(self, filename: str, file_hash: str) -> Tuple[int, List[str]]:
+        """Start tracking a file in the manifest; returns the pages already committed and their chunk IDs"""
+        pages_committed, chunk_ids = self.manifest.start(
+            self.knowledge_base, filename, self.db_manager.document_id_for(filename), file_hash
+        )
+        if pages_committed:
+            print(f"Resuming {filename} after page {pages_committed}")
+            # Chunks written just before an interruption may not have reached the saved indexes
+            if self.db_manager.reindex_chunks(chunk_ids):
+                self.db_manager.save_keyword_index()
+        return pages_committed, chunk_ids
+
+    def _is_unchanged(self, filename: str, file_hash: str) -> bool:
+        """Check whether this exact file is already fully ingested under this filename"""
+        entry = self.manifest.get(self.knowledge_base, filename)
+        return bool(entry and entry["file_hash"] == file_hash and entry["status"] == "complete")
+
+    def _ingest_pages(self, pages: Iterable[Tuple[int, str]], filename: str, pages_total: int = None,
+                      file_hash: str = None, progress_callback: Callable[..., None] = None,
+                      timer: StageTimer = None, resume: Tuple[int, List[str]] = (0, [])) -> Dict[str, Any]:
+        """Chunk, embed and store pages as they stream in, one window of about INGEST_WINDOW_CHUNKS chunks at a time
+
+        With a file hash, each stored window is committed to the manifest; resume is the
+        (pages_committed, chunk_ids) of an interrupted earlier run whose pages are not in pages.
+        """
+        timer = timer or StageTimer(INGEST_STAGE_SECONDS)
+        pages_resumed, resumed_ids = resume
+        if progress_callback:
+            progress_callback(pages_total=pages_total)
+
+        window_texts, window_metadatas = [], []
+        ids, added, skipped, pages_processed = list(resumed_ids), 0, 0, pages_resumed
+        window_chunks = 0
+
+        def flush():
+            nonlocal added, skipped, window_chunks
+            if not window_texts:
+                return
+            result = self.db_manager.upsert_documents(window_texts, window_metadatas, timer=timer)
+            if result["added"]:
+                self.answer_cache.invalidate()
+            if file_hash:
+                self.manifest.commit_pages(
+                    self.knowledge_base, filename, window_metadatas[-1]["page"], result["ids"]
+                )
+            ids.extend(result["ids"])
+            added += result["added"]
+            skipped += result["skipped"]
+            window_texts.clear()
+            window_metadatas.clear()
+            window_chunks = 0
+            if progress_callback:
+                progress_callback(pages_processed=pages_processed, chunks_processed=len(ids))
+
+        # Time spent waiting for the next extracted page counts as parsing
+        for page_number, text in timer.timed_iter(pages, "parse"):
+            window_texts.append(text)
+            metadata = {
+                "source": filename,
+                "page": page_number,
+                "filename": filename
+            }
+            if file_hash:
+                metadata["file_hash"] = file_hash
+            window_metadatas.append(metadata)
+            pages_processed += 1
+            window_chunks += self.db_manager.estimate_chunks(text)
+            if window_chunks >= config.INGEST_WINDOW_CHUNKS:
+                flush()
+        flush()
+        with timer.stage("write"):
+            self.db_manager.save_keyword_index()
+
+            # Drop chunks that are no longer part of this file
+            success = bool(ids)
+            if success and self.db_manager.remove_stale_chunks(filename, ids):
+                self.answer_cache.invalidate()
+            if success and file_hash:
+                self.manifest.complete(self.knowledge_base, filename, pages_processed)
+
+        # Only documents whose content changed are summarized again
+        if success and config.SUMMARIES_ENABLED:
+            with timer.stage("summarize"):
+                try:
+                    if self.summarize_document(self.db_manager.document_id_for(filename)):
+                        self.refresh_corpus_summary()
+                except Exception as e:
+                    print(f"Error summarizing {filename}: {e}")
+        timer.record()
+
+        return {
+            "success": success,
+            "message": (
+                f"Successfully processed {pages_processed} pages "
+                f"({added} new chunks, {skipped} unchanged)"
+            ) if success else "Failed to process PDF",
+            "filename": filename,
+            "document_id": self.db_manager.document_id_for(filename),
+            "pages_processed": pages_processed,
+            "pages_resumed": pages_resumed,
+            "chunks_created": added,
+            "timings": timer.milliseconds()
+        }
+
+    def is_file_ingested(self, file_hash: str) -> bool:
+        """Check whether a PDF with this content hash is fully ingested into the knowledge base"""
+        complete = self.manifest.has_complete(self.knowledge_base, file_hash)
+        if complete is not None:
+            return complete
+        # Files ingested before the manifest existed are only recorded in chunk metadata
+        return self.db_manager.has_file_hash(file_hash)
+
+    @staticmethod
+    def open_pdf_pages(pdf_path: str, timer: StageTimer,
+                        start_page: int = 1) -> Tuple[int, Iterable[Tuple[int, str]]]:
+        """Count a PDF's pages and get a lazy iterator of (page_number, text) from start_page on,
+        parallel for large files"""
+        with timer.stage("parse"):
+            pages_total = count_pages(pdf_path)
+        if config.PDF_PARALLEL_EXTRACTION and pages_total >= config.PDF_PARALLEL_MIN_PAGES:
+            # Extract page ranges in a process pool, streaming pages in order
+            pages = iter_pages_parallel(
+                pdf_path,
+                workers=config.PDF_EXTRACT_WORKERS,
+                pages_per_task=config.PDF_PAGES_PER_TASK,
+                max_inflight_tasks=config.PDF_MAX_INFLIGHT_TASKS,
+                start_page=start_page
+            )
+        elif start_page > 1:
+            # Resuming: pages before start_page are already stored and are not extracted again
+            pages = iter_stream_pages(pdf_path, start_page)
+        else:
+            loader = PyPDFLoader(pdf_path)
+            pages = ((i + 1, doc.page_content) for i, doc in enumerate(loader.lazy_load()))
+        return pages_total, pages
+
+    def load_pdf_from_file(self, pdf_path: str, filename: str = None, file_hash: str = None,
+                           progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Load PDF from file path, optionally reporting progress to a callback
+
+        file_hash skips re-reading the file when the caller hashed it already, e.g. while receiving an upload.
+        """
+        filename = filename or os.path.basename(pdf_path)
         try:
             if not os.path.exists(pdf_path):
                 return {
                     "success": False,
                     "message": f"File not found: {pdf_path}",
-                    "filename": os.path.basename(pdf_path),
+                    "filename": filename,
                     "pages_processed": 0
                 }
 
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
-            
-            # Extract text from documents
-            texts = [doc.page_content for doc in documents]
-            
-            # Add metadata
-            metadatas = [{
-                "source": os.path.basename(pdf_path),
-                "page": i + 1,
-                "filename": os.path.basename(pdf_path)
-            } for i in range(len(texts))]
-            
-            # Add to knowledge base
-            success = self.add_documents(texts, metadatas)
-            
-            return {
-                "success": success,
-                "message": f"Successfully processed {len(texts)} pages" if success else "Failed to process PDF",
-                "filename": os.path.basename(pdf_path),
-                "pages_processed": len(texts),
-                "chunks_created": len(texts)
-            }
-            
+            timer = StageTimer(INGEST_STAGE_SECONDS)
+            if file_hash is None:
+                with timer.stage("hash"):
+                    file_hash = hash_file(pdf_path)
+            if self._is_unchanged(filename, file_hash):
+                return {
+                    "success": True,
+                    "message": f"{filename} is unchanged and already in the knowledge base",
+                    "filename": filename,
+                    "document_id": self.db_manager.document_id_for(filename),
+                    "pages_processed": 0,
+                    "chunks_created": 0
+                }
+
+            resume = self.resume_point(filename, file_hash)
+            pages_total, pages = self.open_pdf_pages(pdf_path, timer, start_page=resume[0] + 1)
+            return self._ingest_pages(pages, filename, pages_total, file_hash, progress_callback, timer, resume)
+
         except Exception as e:
             return {
                 "success": False,
@@ -205,25 +701,28 @@ Please provide a helpful answer based on the context above.
                 "pages_processed": 0
             }
 
-    def load_pdf_from_bytes(self, pdf_content: bytes, filename: str) -> Dict[str, Any]:
-        """Load PDF from bytes content"""
+    def ingest_bulk(self, sources: List[Dict[str, Any]],
+                    progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Ingest many PDFs (see bulk_ingest.resolve_sources) through the staged pipeline"""
+        pipeline = BulkIngestion(
+            self,
+            parse_workers=config.BULK_PARSE_WORKERS,
+            queue_size=config.BULK_QUEUE_SIZE,
+            page_window=config.PDF_PAGE_WINDOW,
+            embed_chunks=config.INGEST_WINDOW_CHUNKS
+        )
+        return pipeline.run(sources, progress_callback)
+
+    def load_pdf_from_stream(self, stream: BinaryIO, filename: str, file_hash: str = None,
+                             progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Load PDF from a file-like object, parsing pages straight from the buffer"""
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                temp_file.write(pdf_content)
-                temp_path = temp_file.name
-            
-            try:
-                # Use the file path method
-                result = self.load_pdf_from_file(temp_path)
-                # Update filename in result
-                result["filename"] = filename
-                return result
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    
+            resume = self.resume_point(filename, file_hash) if file_hash else (0, [])
+            timer = StageTimer(INGEST_STAGE_SECONDS)
+            with timer.stage("parse"):
+                pages_total = count_pages(stream)
+            pages = iter_stream_pages(stream, start_page=resume[0] + 1)
+            return self._ingest_pages(pages, filename, pages_total, file_hash, progress_callback, timer, resume)
         except Exception as e:
             return {
                 "success": False,
@@ -231,34 +730,109 @@ Please provide a helpful answer based on the context above.
                 "filename": filename,
                 "pages_processed": 0
             }
+        finally:
+            stream.close()
 
-    def get_document_summary(self) -> str:
-        """Get summary of loaded documents"""
+    def load_pdf_from_bytes(self, pdf_content: bytes, filename: str,
+                            progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Load PDF from bytes content"""
+        file_hash = hashlib.sha256(pdf_content).hexdigest()
+        return self.load_pdf_from_stream(io.BytesIO(pdf_content), filename, file_hash, progress_callback)
+
+    def summarize_document(self, document_id: str, force: bool = False) -> bool:
+        """Build and store a document's summary unless its content is unchanged; returns True if rebuilt"""
+        chunks = self.db_manager.get_document_chunks(document_id)
+        if not chunks:
+            self.summary_store.delete_document(self.knowledge_base, document_id)
+            return False
+
+        metadata = chunks[0][2]
+        # The file hash identifies a document's content; chunk IDs stand in for documents added as text
+        fingerprint = metadata.get("file_hash") or hashlib.sha256(
+            "\0".join(sorted(chunk_id for chunk_id, _, _ in chunks)).encode("utf-8")
+        ).hexdigest()
+        stored = self.summary_store.get_document(self.knowledge_base, document_id)
+        if stored and stored["fingerprint"] == fingerprint and not force:
+            return False
+
+        filename = metadata.get("filename")
+        summary = self.summarizer.summarize_document(filename or document_id, [text for _, text, _ in chunks])
+        pages = len({chunk_metadata.get("page") for _, _, chunk_metadata in chunks})
+        self.summary_store.put_document(self.knowledge_base, document_id, filename, fingerprint, summary, pages)
+        return True
+
+    def refresh_corpus_summary(self) -> bool:
+        """Merge stored document summaries into the corpus summary if any of them changed"""
+        fingerprint = self.summary_store.documents_fingerprint(self.knowledge_base)
+        corpus = self.summary_store.get_corpus(self.knowledge_base)
+        if corpus and corpus["fingerprint"] == fingerprint:
+            return False
+        documents = self.summary_store.list_documents(self.knowledge_base)
+        summary = self.summarizer.summarize_corpus(documents)
+        self.summary_store.put_corpus(self.knowledge_base, fingerprint, summary, len(documents))
+        return True
+
+    def _refresh_corpus_summary_safely(self):
+        """Refresh the corpus summary, logging instead of raising on LLM errors"""
         try:
-            kb_info = self.get_knowledge_base_info()
-            if kb_info.get("count", 0) == 0:
-                return "No documents loaded"
-            
-            # Get some sample documents for summary
-            sample_docs = self.db_manager.similarity_search("summary", k=3)
-            
-            if not sample_docs:
-                return f"Knowledge base contains {kb_info['count']} document chunks"
-            
-            # Generate summary using LLM
-            context = "\n\n".join([doc.page_content[:200] + "..." for doc in sample_docs])
-            
-            summary_prompt = ChatPromptTemplate.from_template("""
-Based on the following document excerpts, provide a brief summary of the content:
+            self.refresh_corpus_summary()
+        except Exception as e:
+            print(f"Error refreshing corpus summary: {e}")
 
-{context}
+    def refresh_summaries(self, force: bool = False,
+                          progress_callback: Callable[..., None] = None) -> Dict[str, Any]:
+        """Summarize every changed or missing document, drop summaries of deleted ones and update the corpus"""
+        try:
+            documents = self.db_manager.list_documents()
+            document_ids = {document["document_id"] for document in documents}
+            for stored in self.summary_store.list_documents(self.knowledge_base):
+                if stored["document_id"] not in document_ids:
+                    self.summary_store.delete_document(self.knowledge_base, stored["document_id"])
 
-Summary:""")
-            
-            messages = summary_prompt.format_messages(context=context)
-            response = self.llm.invoke(messages)
-            
-            return f"Documents: {kb_info['count']} chunks\nSummary: {response.content}"
-            
+            if progress_callback:
+                progress_callback(pages_total=sum(document["pages"] for document in documents))
+            summarized, pages_processed = 0, 0
+            for document in documents:
+                if self.summarize_document(document["document_id"], force):
+                    summarized += 1
+                pages_processed += document["pages"]
+                if progress_callback:
+                    progress_callback(pages_processed=pages_processed)
+            self.refresh_corpus_summary()
+            return {
+                "success": True,
+                "message": f"Summarized {summarized} of {len(documents)} documents",
+                "documents_summarized": summarized
+            }
+        except Exception as e:
+            return {"success": False, "message": f"Error refreshing summaries: {str(e)}"}
+
+    def get_summaries(self) -> Dict[str, Any]:
+        """Stored corpus and per-document summaries; no LLM calls"""
+        kb_info = self.get_knowledge_base_info()
+        corpus = self.summary_store.get_corpus(self.knowledge_base)
+        documents = self.summary_store.list_documents(self.knowledge_base)
+        if kb_info.get("count", 0) == 0:
+            summary = "No documents loaded"
+        elif corpus and corpus["summary"]:
+            summary = f"Documents: {kb_info['count']} chunks\nSummary: {corpus['summary']}"
+        else:
+            summary = f"Knowledge base contains {kb_info['count']} document chunks; no summary has been built yet"
+        return {
+            "summary": summary,
+            "stale": bool(corpus) and corpus["fingerprint"] != self.summary_store.documents_fingerprint(
+                self.knowledge_base
+            ),
+            "updated_at": corpus["updated_at"] if corpus else None,
+            "documents": [
+                {key: document[key] for key in ("document_id", "filename", "summary", "pages", "updated_at")}
+                for document in documents
+            ]
+        }
+
+    def get_document_summary(self) -> str:
+        """Get summary of loaded documents from storage"""
+        try:
+            return self.get_summaries()["summary"]
         except Exception as e:
-            return f"Error generating summary: {str(e)}"
\ No newline at end of file
+            return f"Error getting summary: {str(e)}"
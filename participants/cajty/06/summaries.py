@@ -0,0 +1,202 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+
+MAP_PROMPT = ChatPromptTemplate.from_template("""
+Summarize the following part of the document "{title}" in a few sentences.
+Keep names, numbers, error codes and other specifics that a reader may search for.
+
+{text}
+
+Summary:""")
+
+REDUCE_PROMPT = ChatPromptTemplate.from_template("""
+The following are summaries of consecutive parts of "{title}".
+Combine them into one concise summary of the whole, without repeating yourself.
+
+{text}
+
+Summary:""")
+
+CORPUS_PROMPT = ChatPromptTemplate.from_template("""
+A knowledge base contains the documents summarized below.
+Write a brief overview of what the knowledge base covers, mentioning the main documents.
+
+{text}
+
+Overview:""")
+
+
+class SummaryStore:
+    """Persistent per-document and corpus summaries, keyed by knowledge base"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS document_summaries (
+                knowledge_base TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                filename TEXT,
+                fingerprint TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (knowledge_base, document_id)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS corpus_summaries (
+                knowledge_base TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                documents INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get_document(self, knowledge_base: str, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get the stored summary of one document"""
+        documents = self.list_documents(knowledge_base, document_id)
+        return documents[0] if documents else None
+
+    def list_documents(self, knowledge_base: str, document_id: str = None) -> List[Dict[str, Any]]:
+        """List stored document summaries of a knowledge base, by filename"""
+        query = (
+            "SELECT document_id, filename, fingerprint, summary, pages, updated_at "
+            "FROM document_summaries WHERE knowledge_base = ?"
+        )
+        params = [knowledge_base]
+        if document_id is not None:
+            query += " AND document_id = ?"
+            params.append(document_id)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY filename", params).fetchall()
+        keys = ("document_id", "filename", "fingerprint", "summary", "pages", "updated_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def put_document(self, knowledge_base: str, document_id: str, filename: Optional[str],
+                     fingerprint: str, summary: str, pages: int):
+        """Store or replace the summary of one document"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO document_summaries "
+                "(knowledge_base, document_id, filename, fingerprint, summary, pages, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (knowledge_base, document_id, filename, fingerprint, summary, pages, time.time())
+            )
+            self._conn.commit()
+
+    def delete_document(self, knowledge_base: str, document_id: str):
+        """Forget the summary of one document"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM document_summaries WHERE knowledge_base = ? AND document_id = ?",
+                (knowledge_base, document_id)
+            )
+            self._conn.commit()
+
+    def documents_fingerprint(self, knowledge_base: str) -> str:
+        """Fingerprint of the current set of document summaries, used to tell if the corpus summary is stale"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT document_id, fingerprint FROM document_summaries "
+                "WHERE knowledge_base = ? ORDER BY document_id",
+                (knowledge_base,)
+            ).fetchall()
+        return hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()
+
+    def get_corpus(self, knowledge_base: str) -> Optional[Dict[str, Any]]:
+        """Get the stored corpus summary of a knowledge base"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, summary, documents, updated_at FROM corpus_summaries WHERE knowledge_base = ?",
+                (knowledge_base,)
+            ).fetchone()
+        return dict(zip(("fingerprint", "summary", "documents", "updated_at"), row)) if row else None
+
+    def put_corpus(self, knowledge_base: str, fingerprint: str, summary: str, documents: int):
+        """Store or replace the corpus summary of a knowledge base"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO corpus_summaries "
+                "(knowledge_base, fingerprint, summary, documents, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (knowledge_base, fingerprint, summary, documents, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self, knowledge_base: str):
+        """Remove every summary of a knowledge base"""
+        with self._lock:
+            self._conn.execute("DELETE FROM document_summaries WHERE knowledge_base = ?", (knowledge_base,))
+            self._conn.execute("DELETE FROM corpus_summaries WHERE knowledge_base = ?", (knowledge_base,))
+            self._conn.commit()
+
+
+class Summarizer:
+    """Map-reduce summarization: parts of a text are summarized concurrently, then merged in rounds"""
+
+    def __init__(self, llm, map_chars: int = 12000, fan_in: int = 8, max_concurrency: int = 4):
+        self.llm = llm
+        self.map_chars = map_chars
+        self.fan_in = max(2, fan_in)
+        self.max_concurrency = max_concurrency
+
+    def _invoke(self, prompt: ChatPromptTemplate, title: str, texts: List[str]) -> List[str]:
+        """Run one prompt per text with bounded concurrency"""
+        if not texts:
+            return []
+        responses = self.llm.batch(
+            [prompt.format_messages(title=title, text=text) for text in texts],
+            config={"max_concurrency": self.max_concurrency}
+        )
+        return [response.content.strip() for response in responses]
+
+    def _segments(self, texts: List[str]) -> List[str]:
+        """Group consecutive texts (chunks, at most CHUNK_SIZE each) into segments of about map_chars"""
+        segments, current, size = [], [], 0
+        for text in texts:
+            if current and size + len(text) > self.map_chars:
+                segments.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(text)
+            size += len(text)
+        if current:
+            segments.append("\n\n".join(current))
+        return segments
+
+    def _reduce(self, prompt: ChatPromptTemplate, title: str, summaries: List[str]) -> str:
+        """Merge summaries fan_in at a time until one remains"""
+        while len(summaries) > 1:
+            groups = [summaries[i:i + self.fan_in] for i in range(0, len(summaries), self.fan_in)]
+            summaries = self._invoke(prompt, title, ["\n\n".join(group) for group in groups])
+        return summaries[0] if summaries else ""
+
+    def summarize_document(self, title: str, texts: List[str]) -> str:
+        """Summarize a document from its texts in reading order"""
+        partials = self._invoke(MAP_PROMPT, title, self._segments(texts))
+        return self._reduce(REDUCE_PROMPT, title, partials)
+
+    def summarize_corpus(self, documents: List[Dict[str, Any]]) -> str:
+        """Merge document summaries into an overview of the knowledge base"""
+        entries = [f"{document['filename'] or document['document_id']}: {document['summary']}" for document in documents]
+        if not entries:
+            return ""
+        # Many documents: merge groups of summaries first so the overview prompt stays small
+        while len(entries) > self.fan_in:
+            groups = [entries[i:i + self.fan_in] for i in range(0, len(entries), self.fan_in)]
+            entries = self._invoke(REDUCE_PROMPT, "the knowledge base", ["\n\n".join(group) for group in groups])
+        return self._invoke(CORPUS_PROMPT, "the knowledge base", ["\n\n".join(entries)])[0]
@@ -0,0 +1,20 @@
+"""Request validation of /chat/batch; rejected before any knowledge base is opened."""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import main  # noqa: E402
+
+client = TestClient(main.app)
+
+
+@pytest.mark.parametrize("max_concurrency", [0, -1])
+def test_batch_chat_rejects_non_positive_max_concurrency(max_concurrency):
+    response = client.post("/chat/batch", json={"queries": ["What is E1042?"], "max_concurrency": max_concurrency})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "max_concurrency"]